@@ -0,0 +1,209 @@
+# benchmark_api.py - BENCHMARK DA EXTRAÇÃO VIA API CONTRA O MOCK LOCAL
+import os
+import sys
+import csv
+import json
+import time
+import logging
+import argparse
+import tempfile
+import importlib
+import subprocess
+
+import mock_unipix_api
+
+# =============================================================================
+# CONFIGURAÇÕES DO BENCHMARK
+# =============================================================================
+BENCH_SCRIPT = "etl_chrome_api"  # Módulo testado (etl_chrome_api ou etl_firefox_api)
+BENCH_TAMANHOS = [10000, 50000, 200000]  # Registros no mock em cada rodada
+BENCH_MODOS = ["sequencial", "concorrente", "sharded", "async"]
+BENCH_PERIODO = "01/01/2024 - 31/01/2024"  # Mesmo período do conjunto simulado
+BENCH_TIMEOUT = 1800  # Tempo máximo de cada execução (segundos)
+BENCH_REPETICOES_IMPORT = 3  # Imports medidos em processos novos (vale o menor tempo)
+
+def pico_rss_mb():
+    """Pico de memória residente do processo atual em MB (None se não der para medir)"""
+    try:
+        import resource
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux informa em KB, macOS em bytes
+        return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil  # Windows: não há módulo resource
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    except (ImportError, AttributeError):
+        return None
+
+def contar_linhas_csv(caminho):
+    """Conta os registros de um CSV gerado (sem o cabeçalho)"""
+    with open(caminho, "r", encoding="utf-8-sig", newline="") as f:
+        return max(sum(1 for _ in csv.reader(f)) - 1, 0)
+
+def consultas_diarias(periodo):
+    """Quebra o período em uma consulta por dia (entrada do motor asyncio)"""
+    from datetime import datetime, timedelta
+    inicio_txt, fim_txt = [parte.strip() for parte in periodo.split(" - ")]
+    dia = datetime.strptime(inicio_txt, "%d/%m/%Y")
+    fim = datetime.strptime(fim_txt, "%d/%m/%Y")
+    consultas = []
+    while dia <= fim:
+        texto = dia.strftime("%d/%m/%Y")
+        consultas.append({"periodo": f"{texto} - {texto}"})
+        dia += timedelta(days=1)
+    return consultas
+
+def medir_importacao(script, repeticoes=BENCH_REPETICOES_IMPORT):
+    """Tempo de import do módulo num interpretador novo (custo de startup antes do menu)"""
+    codigo = f"import time; t = time.perf_counter(); import {script}; print(time.perf_counter() - t)"
+    tempos = []
+    for _ in range(repeticoes):
+        saida = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True, timeout=120,
+                               cwd=os.path.dirname(os.path.abspath(__file__)))
+        if saida.returncode != 0:
+            return None
+        tempos.append(float(saida.stdout.strip().splitlines()[-1]))
+    return min(tempos)
+
+# =============================================================================
+# EXECUÇÃO DE UM MODO (PROCESSO FILHO)
+# =============================================================================
+def executar_modo(script, modo, url, periodo, limite=0):
+    """Roda um modo de extração isolado e devolve as métricas
+
+    Cada modo roda num processo próprio para o pico de RSS não herdar o das rodadas anteriores.
+    """
+    pasta = tempfile.mkdtemp(prefix="bench_unipix_")
+    modulo = importlib.import_module(script)
+
+    # Benchmark mede rede + gravação: caches, spool e ajuste de página ficam desligados;
+    # o limitador de taxa só entra se pedido
+    modulo.DOWNLOAD_FOLDER = pasta
+    modulo.USAR_CACHE_RESPOSTAS = False
+    modulo.USAR_SPOOL = False
+    modulo.PAGINA_ADAPTATIVA = False
+    modulo.LIMITE_REQUISICOES_S = limite
+
+    config = modulo.Config()
+    config.logger.setLevel(logging.WARNING)
+    scraper = modulo.UnipixScraperAPI(config, pasta)
+    scraper.api_url = url
+    scraper.token = "benchmark"
+
+    inicio = time.perf_counter()
+    if modo == "sequencial":
+        arquivos = [scraper.baixar_relatorio_via_api(periodo, workers=1, formato="csv")]
+    elif modo == "concorrente":
+        arquivos = [scraper.baixar_relatorio_via_api(periodo, workers=modulo.API_WORKERS, formato="csv")]
+    elif modo == "sharded":
+        arquivos = [scraper.baixar_relatorio_sharded(periodo, workers=modulo.API_WORKERS, formato="csv")]
+    elif modo == "async":
+        if modulo.aiohttp is None:
+            return {"erro": "aiohttp não instalado"}
+        arquivos = scraper.baixar_relatorios_async(consultas_diarias(periodo))
+    else:
+        return {"erro": f"modo desconhecido: {modo}"}
+    tempo = time.perf_counter() - inicio
+    rss = pico_rss_mb()
+
+    linhas = sum(contar_linhas_csv(caminho) for caminho in arquivos if caminho)
+    for caminho in arquivos:
+        if caminho and os.path.exists(caminho):
+            os.remove(caminho)
+
+    return {"linhas": linhas, "tempo": tempo, "rss_mb": rss}
+
+# =============================================================================
+# ORQUESTRAÇÃO
+# =============================================================================
+def rodar_benchmark(script, tamanhos, modos, periodo, opcoes_mock, limite=0):
+    """Sobe o mock para cada tamanho e mede todos os modos"""
+    resultados = []
+    for tamanho in tamanhos:
+        servidor, url = mock_unipix_api.iniciar_em_thread(registros=tamanho, **opcoes_mock)
+        print(f"\n🧪 Mock com {tamanho} registros em {url}")
+        try:
+            for modo in modos:
+                requisicoes_antes = servidor.requisicoes
+                comando = [sys.executable, os.path.abspath(__file__), "--filho", "--script", script,
+                           "--modo", modo, "--url", url, "--periodo", periodo, "--limite", str(limite)]
+                try:
+                    saida = subprocess.run(comando, capture_output=True, text=True, timeout=BENCH_TIMEOUT,
+                                           cwd=os.path.dirname(os.path.abspath(__file__)))
+                    linhas_saida = saida.stdout.strip().splitlines()
+                    metrica = json.loads(linhas_saida[-1]) if linhas_saida else {"erro": saida.stderr.strip()[-300:]}
+                except subprocess.TimeoutExpired:
+                    metrica = {"erro": f"timeout de {BENCH_TIMEOUT}s"}
+                except ValueError:
+                    metrica = {"erro": saida.stderr.strip()[-300:] or "saída inválida"}
+
+                metrica.update({"tamanho": tamanho, "modo": modo,
+                                "requisicoes": servidor.requisicoes - requisicoes_antes})
+                if metrica.get("tempo"):
+                    metrica["linhas_s"] = metrica["linhas"] / metrica["tempo"]
+                resultados.append(metrica)
+                imprimir_linha(metrica)
+        finally:
+            servidor.shutdown()
+            servidor.server_close()
+    return resultados
+
+def imprimir_linha(metrica):
+    if "erro" in metrica:
+        print(f"   {metrica['modo']:<12} ❌ {metrica['erro']}")
+        return
+    rss = f"{metrica['rss_mb']:.0f} MB" if metrica.get("rss_mb") is not None else "n/d"
+    print(f"   {metrica['modo']:<12} {metrica['linhas']:>9} linhas  {metrica['tempo']:>8.2f}s  "
+          f"{metrica.get('linhas_s', 0):>10.0f} linhas/s  pico RSS {rss:>8}  {metrica['requisicoes']:>5} req")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da extração via API contra o mock local")
+    parser.add_argument("--script", default=BENCH_SCRIPT, help="módulo testado")
+    parser.add_argument("--tamanhos", default=",".join(str(t) for t in BENCH_TAMANHOS),
+                        help="registros no mock, separados por vírgula")
+    parser.add_argument("--modos", default=",".join(BENCH_MODOS), help="modos, separados por vírgula")
+    parser.add_argument("--periodo", default=BENCH_PERIODO)
+    parser.add_argument("--latencia", type=float, default=mock_unipix_api.MOCK_LATENCIA)
+    parser.add_argument("--latencia-por-registro", type=float, default=mock_unipix_api.MOCK_LATENCIA_POR_REGISTRO)
+    parser.add_argument("--jitter", type=float, default=mock_unipix_api.MOCK_JITTER)
+    parser.add_argument("--taxa-erro", type=float, default=mock_unipix_api.MOCK_TAXA_ERRO)
+    parser.add_argument("--taxa-429", type=float, default=mock_unipix_api.MOCK_TAXA_429)
+    parser.add_argument("--limite", type=float, default=0,
+                        help="requisições/s do limitador do cliente (0 = sem limite)")
+    parser.add_argument("--saida", help="grava os resultados em JSON (para comparar entre versões)")
+    parser.add_argument("--filho", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--modo", help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.filho:
+        # Última linha do stdout = métricas em JSON (o resto é log)
+        print(json.dumps(executar_modo(args.script, args.modo, args.url, args.periodo, args.limite)))
+        return
+
+    opcoes_mock = {
+        "latencia": args.latencia,
+        "latencia_por_registro": args.latencia_por_registro,
+        "jitter": args.jitter,
+        "taxa_erro": args.taxa_erro,
+        "taxa_429": args.taxa_429
+    }
+    tamanhos = [int(t) for t in args.tamanhos.split(",") if t.strip()]
+    modos = [m.strip() for m in args.modos.split(",") if m.strip()]
+
+    print(f"⏱️  Benchmark de {args.script}: modos {', '.join(modos)}")
+    tempo_import = medir_importacao(args.script)
+    print(f"   import do módulo: {tempo_import * 1000:.0f} ms" if tempo_import is not None
+          else "   import do módulo: falhou")
+    resultados = rodar_benchmark(args.script, tamanhos, modos, args.periodo, opcoes_mock, args.limite)
+    resultados.insert(0, {"modo": "import", "tempo": tempo_import})
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Resultados gravados em {args.saida}")
+
+if __name__ == "__main__":
+    main()
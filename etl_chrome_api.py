@@ -1,7 +1,9 @@
 # main.py - ETL UNIPIX ULTIMATE COM API + TOKENS (SSL FIX)
+import time
+_INICIO_IMPORTS = time.perf_counter()
 import os
-import pandas as pd
-import numpy as np
+import importlib
+import importlib.util
 import sqlite3
 from datetime import datetime
 import logging
@@ -9,37 +11,168 @@ import shutil
 import zipfile
 import tempfile
 import getpass
-import time
 import json
+import csv
 import re
 import calendar
+import math
+import hashlib
+import base64
+import threading
+import random
+import email.utils
+import itertools
+import gzip
 from pathlib import Path
-from datetime import datetime, date, time as dtime
+from datetime import datetime, date, timedelta, time as dtime
 import urllib3
 import ssl
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import requests
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+
+try:
+    import orjson  # Opcional: decodificação JSON mais rápida das páginas da API
+except ImportError:
+    orjson = None
+
+try:
+    from watchdog.observers import Observer  # Opcional: notificação de mudança na planilha de 2FA
+except ImportError:
+    Observer = None
+
+# =============================================================================
+# IMPORTAÇÃO TARDIA (STARTUP RÁPIDO)
+# =============================================================================
+TEMPOS_IMPORTACAO = {}  # módulo -> segundos gastos no import tardio
+
+class ModuloTardio:
+    """Importa o módulo só no primeiro acesso a um atributo (menu e caminhos curtos não pagam o import)"""
+    def __init__(self, nome):
+        self._nome = nome
+        self._modulo = None
+    
+    def __getattr__(self, atributo):
+        if self._modulo is None:
+            inicio = time.perf_counter()
+            self._modulo = importlib.import_module(self._nome)
+            TEMPOS_IMPORTACAO[self._nome] = time.perf_counter() - inicio
+            logging.getLogger('ETL-API').info(f"📦 {self._nome} importado em {TEMPOS_IMPORTACAO[self._nome] * 1000:.0f} ms")
+        return getattr(self._modulo, atributo)
+
+def importar_tardio(nome, opcional=False):
+    """Proxy de import tardio; com opcional=True devolve None se o pacote não estiver instalado"""
+    if opcional and importlib.util.find_spec(nome.split(".")[0]) is None:
+        return None
+    return ModuloTardio(nome)
+
+class _SeleniumNaoCarregado(Exception):
+    """Ocupa o lugar das exceções do Selenium nos except antes de carregar_selenium()"""
+
+webdriver = By = WebDriverWait = EC = Options = None
+TimeoutException = NoSuchElementException = _SeleniumNaoCarregado
+StaleElementReferenceException = WebDriverException = _SeleniumNaoCarregado
+
+def carregar_selenium():
+    """Importa o Selenium só quando o navegador é realmente aberto"""
+    global webdriver, By, WebDriverWait, EC, Options, TimeoutException, NoSuchElementException
+    global StaleElementReferenceException, WebDriverException
+    if webdriver is not None:
+        return
+    inicio = time.perf_counter()
+    from selenium import webdriver
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.chrome.options import Options
+    from selenium.common.exceptions import TimeoutException, NoSuchElementException
+    from selenium.common.exceptions import StaleElementReferenceException, WebDriverException
+    TEMPOS_IMPORTACAO["selenium"] = time.perf_counter() - inicio
+    logging.getLogger('ETL-API').info(f"📦 selenium importado em {TEMPOS_IMPORTACAO['selenium'] * 1000:.0f} ms")
+
+# Pacotes pesados: importados no primeiro uso (opcionais viram None se não instalados)
+pd = importar_tardio("pandas")
+np = importar_tardio("numpy")
+aiohttp = importar_tardio("aiohttp", opcional=True)  # Opcional: só necessário para o motor asyncio
+pa = importar_tardio("pyarrow", opcional=True)  # Opcional: só necessário para saída em Parquet
+pq = importar_tardio("pyarrow.parquet", opcional=True)
+criptografia = importar_tardio("cryptography.fernet", opcional=True)  # Opcional: cache de sessão criptografado
 
 # Desabilitar warnings de SSL (opcional)
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+TEMPO_IMPORTS = time.perf_counter() - _INICIO_IMPORTS  # Custo de carregar o módulo (logado no main)
+
 # =============================================================================
 # CONFIGURAÇÕES GLOBAIS 
 # =============================================================================
 UNIPIX_USUARIO = "xxxxxxx@xxxxxxx"
 UNIPIX_SENHA = "xxxxxxx"
+# Registro de contas do modo multi-conta: cada uma com a própria planilha de 2FA (None = planilha padrão)
+CONTAS_UNIPIX = [
+    {"usuario": UNIPIX_USUARIO, "senha": UNIPIX_SENHA, "planilha_2fa": None},
+]
 DOWNLOAD_FOLDER = r"C:\Users\xxxxxxxx\Desktop\aprendizado\data\input"
 
 # URLs da API
 LOGIN_URL = "https://avia.unipix.com.br/#/login"
 API_URL = "https://aws-api-sms-interna.unipix.com.br/relatorio-analitico"
+AUTH_URL = "https://aws-api-sms-interna.unipix.com.br/auth/login"  # Login sem navegador: POST usuário/senha
+AUTH_2FA_URL = "https://aws-api-sms-interna.unipix.com.br/auth/2fa"  # Login sem navegador: POST do código 2FA
+AUTH_CAMPOS_DESAFIO = ["challengeId", "transactionId", "sessionId", "mfaToken"]  # Reenviados junto com o código
+AUTH_INDICADORES_2FA = ["requires2fa", "mfaRequired", "twoFactorRequired"]  # Flags de "pede código" na 1ª resposta
+AUTH_COOKIES_SESSAO = ["SESSION"]  # Cookies que valem como sessão quando a resposta não traz JWT
+LOGIN_HTTP = False  # Login só por HTTP (navegador como fallback) - ligar só após confirmar as URLs AUTH_*
 DEFAULT_PAGE_SIZE = 500
+MAX_PAGES = 50  # Limite de segurança de páginas por extração
+API_WORKERS = 4  # Requisições simultâneas (use 1 para o modo sequencial)
+API_CONCORRENCIA_GLOBAL = 8  # Requisições em voo somando todas as contas e workers do processo
+POOL_LOGINS_SIMULTANEOS = 2  # Navegadores abertos ao mesmo tempo no login multi-conta
+ASYNC_CONCORRENCIA = 20  # Limite de requisições em voo no motor asyncio (dentro de API_CONCORRENCIA_GLOBAL)
+ASYNC_ORCAMENTO_POLL = 0.01  # Intervalo (s) com que o motor asyncio tenta uma vaga no orçamento do processo
+FORMATO_SAIDA = "csv"  # "csv" ou "parquet" (requer pyarrow)
+MODO_EXTRACAO = "paginas"  # "paginas", "sharded" (janelas de data), "incremental" (marca d'água) ou "fanout"
+FANOUT_PARTICOES = []  # Modo "fanout": combinações de filtros, ex. [{"centroCusto": "CC01"}, {"centroCusto": "CC02"}]
+SHARD_JANELA = "dia"  # Janela inicial dos shards: "dia" ou "hora"
+SHARD_AUTOMATICO = True  # Modo "paginas": passa para shards só se a 1ª página indicar mais que MAX_PAGES páginas
+SHARD_JANELA_MINIMA = timedelta(hours=1)  # Menor janela aceita ao subdividir shards grandes
+WATERMARK_CAMPO = "status"  # Delta incremental por "status" (dataInicialStatus) ou "envio" (dataInicialEnvio)
+WATERMARK_SOBREPOSICAO = timedelta(minutes=5)  # Margem para registros gravados com atraso
+USAR_CACHE_SESSAO = True  # Reaproveita token/cookies válidos e pula o login no navegador
+SESSAO_MARGEM_EXPIRACAO = 120  # Segundos antes do exp do JWT em que a sessão já é tratada como vencida
+LOGIN_TIMEOUT = 30  # Timeout de cada espera explícita do login no navegador (segundos)
+LOGIN_TIMEOUT_2FA = 120  # Tempo máximo aguardando a planilha receber o código 2FA (segundos)
+REDE_OCIOSA_JANELA = 0.5  # Segundos sem requisições novas para considerar a página ociosa
+NAVEGADOR_ENXUTO = True  # Login com navegador enxuto: sem imagens, mídia, fontes e rastreadores
+NAVEGADOR_HEADLESS = None  # None = headless sempre que o modo enxuto estiver ligado; True/False força
+NAVEGADOR_BLOQUEAR = [  # Padrões de URL bloqueados no modo enxuto (Chrome, via CDP)
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot", "*.mp4", "*.webm", "*.mp3",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*facebook.net*",
+    "*hotjar.com*", "*clarity.ms*",
+]
+PLANILHA_POLL_FALLBACK = 0.5  # Intervalo de checagem da planilha de 2FA sem watchdog (segundos)
+PLANILHA_POLL_SEGURANCA = 5  # Checagem extra com watchdog, para pastas sincronizadas que não notificam
+REAUTH_MAX = 1  # Reautenticações permitidas por execução ao receber 401 / token vencendo
+TRANSPORTE_TENTATIVAS = 4  # Novas tentativas em 429/5xx/timeouts
+TRANSPORTE_BACKOFF_BASE = 1.0  # Segundos; dobra a cada tentativa (com jitter)
+TRANSPORTE_BACKOFF_MAX = 60  # Teto do backoff exponencial em segundos
+TRANSPORTE_RETRY_AFTER_MAX = 300  # Teto para o Retry-After informado pelo servidor
+PAGINA_ADAPTATIVA = True  # Ajusta o size das páginas pela vazão observada (persistido por endpoint)
+PAGINA_TAMANHO_MIN = 100  # Menor size aceito pelo ajuste adaptativo
+PAGINA_TAMANHO_MAX = 10000  # Maior size aceito pelo ajuste adaptativo
+PAGINA_LATENCIA_MAX = 30  # Teto de latência por página (segundos)
+USAR_SPOOL = True  # Guarda cada página em data/state/spool para retomar downloads interrompidos
+SPOOL_VALIDADE = timedelta(hours=24)  # Spool sem página nova há mais tempo que isso é apagado, não retomado
+USAR_CACHE_RESPOSTAS = True  # Reaproveita respostas da API gravadas em data/state/cache_api
+CACHE_TTL_FECHADO = 30 * 24 * 3600  # Validade das respostas de períodos já encerrados (segundos)
+CACHE_TTL_ABERTO = 15 * 60  # Validade das respostas que tocam o mês corrente (segundos)
+CACHE_MAX_BYTES = 512 * 1024 * 1024  # Tamanho máximo do cache em disco (comprimido)
+LIMITE_REQUISICOES_S = 10  # Teto de requisições/s do processo inteiro (0 = sem limite)
+LIMITE_RAJADA = 5  # Requisições que podem sair de uma vez antes do limitador segurar
+LIMITE_TAXA_MINIMA = 0.5  # Piso da taxa depois de sucessivos 429
+LIMITE_RECUPERACAO = 0.1  # Req/s recuperados a cada resposta bem-sucedida após um 429
 
 # =============================================================================
 # CONFIGURAÇÕES
@@ -52,9 +185,10 @@ class Config:
         self.processed_folder = os.path.join(self.base_dir, 'data', 'processed') 
         self.error_folder = os.path.join(self.base_dir, 'data', 'error')
         self.temp_folder = os.path.join(self.base_dir, 'data', 'temp')
+        self.state_folder = os.path.join(self.base_dir, 'data', 'state')  # Estado entre execuções
         
         # Criar pastas
-        for folder in [self.input_folder, self.processed_folder, self.error_folder, self.temp_folder]:
+        for folder in [self.input_folder, self.processed_folder, self.error_folder, self.temp_folder, self.state_folder]:
             os.makedirs(folder, exist_ok=True)
         
         # Configurar logging
@@ -68,102 +202,123 @@ class Config:
 # =============================================================================
 # LEITOR DE CÓDIGO DA PLANILHA EXCEL (MANTIDO IGUAL)
 # =============================================================================
+class ObservadorPlanilha:
+    """Handler do watchdog: sinaliza o evento quando o arquivo da planilha é criado/alterado/movido"""
+    def __init__(self, caminho, evento):
+        self.caminho = os.path.normcase(os.path.abspath(caminho))
+        self.evento = evento
+    
+    def dispatch(self, event):
+        for caminho in (getattr(event, "src_path", None), getattr(event, "dest_path", None)):
+            if caminho and os.path.normcase(os.path.abspath(caminho)) == self.caminho:
+                self.evento.set()
+                return
+
 class PlanilhaCodeReader:
-    def __init__(self, config):
+    def __init__(self, config, caminho_planilha=None):
         self.config = config
         self.logger = config.logger
-        self.caminho_planilha = r"C:\Users\marlon.carvalho\OneDrive - Ministério do Desenvolvimento e Assistência Social\Documentos\Unip\cod_unipix.csv"
+        self.caminho_planilha = caminho_planilha or r"C:\Users\marlon.carvalho\OneDrive - Ministério do Desenvolvimento e Assistência Social\Documentos\Unip\cod_unipix.csv"
+    
+    def _aguardar_evento(self, condicao, tempo_maximo):
+        """Espera condicao() ficar verdadeira, reavaliando a cada gravação no arquivo
+        
+        Com watchdog acorda pela notificação do sistema de arquivos (mais uma checagem de
+        segurança a cada PLANILHA_POLL_SEGURANCA s, pois pastas sincronizadas nem sempre notificam);
+        sem watchdog cai para polling curto.
+        """
+        limite = time.monotonic() + tempo_maximo
+        mudou = threading.Event()
+        observador = None
+        pasta = os.path.dirname(os.path.abspath(self.caminho_planilha))
+        if Observer is not None and os.path.isdir(pasta):
+            observador = Observer()
+            observador.schedule(ObservadorPlanilha(self.caminho_planilha, mudou), pasta, recursive=False)
+            observador.start()
+        intervalo = PLANILHA_POLL_SEGURANCA if observador else PLANILHA_POLL_FALLBACK
+        
+        try:
+            while True:
+                if condicao():
+                    return True
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    return False
+                mudou.wait(min(intervalo, restante))
+                mudou.clear()
+        finally:
+            if observador:
+                observador.stop()
+                observador.join(timeout=2)
+    
+    def _tamanho(self):
+        try:
+            return os.path.getsize(self.caminho_planilha)
+        except OSError:
+            return 0
+    
+    def _modificado_em(self):
+        try:
+            return os.path.getmtime(self.caminho_planilha)
+        except OSError:
+            return 0.0
     
     def aguardar_planilha_pronta(self, tempo_maximo=180):
-        """Aguarda a planilha ficar disponível e estável"""
+        """Aguarda a planilha existir com conteúdo"""
+        self.logger.info(f"⏳ Aguardando planilha ficar pronta (máximo {tempo_maximo}s)...")
+        if self._aguardar_evento(lambda: self._tamanho() > 0, tempo_maximo):
+            return True
+        self.logger.error("❌ Timeout - Planilha não ficou pronta a tempo")
+        return False
+    
+    def aguardar_atualizacao(self, desde, tempo_maximo=LOGIN_TIMEOUT_2FA):
+        """Espera a planilha ser regravada depois de `desde` (epoch) - True se atualizou a tempo"""
+        if self._aguardar_evento(lambda: self._modificado_em() > desde, tempo_maximo):
+            self.logger.info("📊 Planilha atualizada após o envio do login")
+            return True
+        self.logger.warning(f"⚠️  Planilha não foi atualizada em {tempo_maximo}s")
+        return False
+    
+    def ler_primeira_celula(self):
+        """Lê só a célula A1: a primeira linha do arquivo até o primeiro separador"""
         try:
-            self.logger.info(f"⏳ Aguardando planilha ficar pronta (máximo {tempo_maximo}s)...")
-            
-            tempo_inicio = time.time()
-            ultimo_tamanho = 0
-            tentativas_estavel = 0
-            
-            while time.time() - tempo_inicio < tempo_maximo:
-                if not os.path.exists(self.caminho_planilha):
-                    self.logger.info("📁 Planilha ainda não encontrada, aguardando...")
-                    time.sleep(5)
-                    continue
-                
-                try:
-                    tamanho_atual = os.path.getsize(self.caminho_planilha)
-                    
-                    if tamanho_atual != ultimo_tamanho:
-                        self.logger.info(f"📊 Planilha detectada, tamanho: {tamanho_atual} bytes")
-                        ultimo_tamanho = tamanho_atual
-                        tentativas_estavel = 0
-                        time.sleep(2)
-                        continue
-                    
-                    tentativas_estavel += 1
-                    if tentativas_estavel >= 3:
-                        self.logger.info("✅ Planilha estável e pronta para leitura")
-                        return True
-                    
-                    time.sleep(2)
-                    
-                except OSError as e:
-                    self.logger.info(f"⚠️  Arquivo ainda não acessível: {e}")
-                    time.sleep(3)
-                    continue
-            
-            self.logger.error("❌ Timeout - Planilha não ficou pronta a tempo")
-            return False
-            
-        except Exception as e:
-            self.logger.error(f"❌ Erro ao aguardar planilha: {e}")
-            return False
+            with open(self.caminho_planilha, "rb") as f:
+                linha = f.readline(4096)
+        except OSError as e:
+            self.logger.info(f"⚠️  Arquivo ainda não acessível: {e}")
+            return None
+        try:
+            texto = linha.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            texto = linha.decode("cp1252", errors="replace")
+        celula = re.split(r"[,;\t]", texto.strip(), maxsplit=1)[0]
+        return celula.strip().strip('"').strip() or None
     
-    def ler_codigo_da_planilha(self):
-        """Lê o código da célula 1A da planilha CSV"""
+    def ler_codigo_da_planilha(self, tempo_maximo=180):
+        """Lê o código da célula A1; se ainda não for válido, espera a próxima gravação do arquivo"""
         try:
-            if not self.aguardar_planilha_pronta():
+            if not self.aguardar_planilha_pronta(tempo_maximo):
                 return None
             
             self.logger.info(f"📊 Lendo planilha CSV: {self.caminho_planilha}")
+            limite = time.monotonic() + tempo_maximo
+            
+            while True:
+                lido_em = self._modificado_em()
+                codigo = self.ler_primeira_celula()
+                if codigo:
+                    self.logger.info(f"✅ Código lido da planilha: {codigo}")
+                    if self.validar_formato_codigo(codigo):
+                        return codigo
+                else:
+                    self.logger.warning("⚠️  Célula A1 vazia")
+                
+                # Gravação pela metade ou código antigo: espera o arquivo mudar de novo
+                restante = limite - time.monotonic()
+                if restante <= 0 or not self._aguardar_evento(lambda: self._modificado_em() != lido_em, restante):
+                    break
             
-            for tentativa in range(5):
-                try:
-                    try:
-                        df = pd.read_csv(self.caminho_planilha, header=None, encoding='utf-8')
-                    except UnicodeDecodeError:
-                        try:
-                            df = pd.read_csv(self.caminho_planilha, header=None, encoding='latin-1')
-                        except UnicodeDecodeError:
-                            df = pd.read_csv(self.caminho_planilha, header=None, encoding='cp1252')
-                    
-                    if df.empty:
-                        self.logger.warning(f"⚠️  Planilha vazia na tentativa {tentativa + 1}")
-                        time.sleep(3)
-                        continue
-                    
-                    codigo = df.iloc[0, 0] if not df.empty else None
-                    
-                    if pd.isna(codigo) or codigo == "" or str(codigo).strip() == "":
-                        self.logger.warning(f"⚠️  Célula A1 vazia na tentativa {tentativa + 1}")
-                        time.sleep(3)
-                        continue
-                    
-                    codigo_str = str(codigo).strip()
-                    self.logger.info(f"✅ Código lido da planilha: {codigo_str}")
-                    
-                    if self.validar_formato_codigo(codigo_str):
-                        return codigo_str
-                    else:
-                        self.logger.warning(f"⚠️  Código com formato inválido: {codigo_str}")
-                        time.sleep(3)
-                        continue
-                        
-                except Exception as e:
-                    self.logger.warning(f"⚠️  Erro na tentativa {tentativa + 1}: {e}")
-                    time.sleep(3)
-                    continue
-            
-            self.logger.error("❌ Todas as tentativas de leitura falharam")
+            self.logger.error("❌ Nenhum código válido na planilha dentro do prazo")
             return None
             
         except Exception as e:
@@ -197,6 +352,18 @@ def is_jwt(texto: str) -> bool:
     partes = texto.split('.')
     return len(partes) == 3
 
+def jwt_expiracao(token: str):
+    """Lê o claim exp (epoch em segundos) do payload do JWT, sem validar assinatura"""
+    if not is_jwt(token):
+        return None
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get('exp')
+        return int(exp) if exp is not None else None
+    except (ValueError, TypeError, AttributeError):
+        return None
+
 def first_last_of_current_month_utc_isoz(tz_name: str = "America/Sao_Paulo"):
     """Retorna datas do mês atual em formato ISO UTC"""
     today = date.today()
@@ -237,6 +404,119 @@ def build_params(inicio_iso: str, fim_iso: str, page: int, size: int, **extras)
     base.update({k: v for k, v in extras.items() if v is not None})
     return base
 
+def combinar_filtros(**valores) -> list:
+    """Produto cartesiano de filtros: combinar_filtros(centroCusto=["CC01", "CC02"], status=["ENTREGUE"])"""
+    chaves = list(valores)
+    return [dict(zip(chaves, combinacao)) for combinacao in itertools.product(*(valores[c] for c in chaves))]
+
+def rotulo_particao(filtros: dict) -> str:
+    """Nome seguro para arquivo a partir de uma combinação de filtros (com hash curto dos valores originais)"""
+    usados = {chave: valor for chave, valor in sorted(filtros.items()) if valor not in (None, "")}
+    if not usados:
+        return "todos"
+    legivel = re.sub(r"[^\w.-]+", "_", "_".join(f"{chave}-{valor}" for chave, valor in usados.items()))
+    # A limpeza junta valores diferentes ("a/b" e "a b" viram "a_b"); o hash mantém os rótulos distintos
+    serializado = json.dumps(usados, sort_keys=True, ensure_ascii=False, default=str)
+    return f"{legivel}_{hashlib.sha256(serializado.encode('utf-8')).hexdigest()[:8]}"
+
+def iso_para_datetime(iso: str) -> datetime:
+    """Converte AAAA-MM-DDTHH:MM:SS.mmmZ para datetime (sem fuso)"""
+    return datetime.strptime(iso, "%Y-%m-%dT%H:%M:%S.%fZ")
+
+def datetime_para_iso(dt: datetime) -> str:
+    """Converte datetime para o formato ISO com milissegundos usado pela API"""
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.") + f"{dt.microsecond // 1000:03d}Z"
+
+def dividir_periodo_iso(inicio_iso: str, fim_iso: str, passo: timedelta) -> list:
+    """Divide [inicio, fim] em janelas consecutivas e disjuntas de tamanho passo"""
+    inicio = iso_para_datetime(inicio_iso)
+    fim = iso_para_datetime(fim_iso)
+    janelas = []
+    while inicio <= fim:
+        proximo = inicio + passo
+        fim_janela = min(proximo - timedelta(milliseconds=1), fim)
+        janelas.append((datetime_para_iso(inicio), datetime_para_iso(fim_janela)))
+        inicio = proximo
+    return janelas
+
+def dividir_janela_ao_meio(inicio_iso: str, fim_iso: str, duracao_minima: timedelta):
+    """Divide uma janela em duas metades; None se já estiver no tamanho mínimo"""
+    inicio = iso_para_datetime(inicio_iso)
+    fim = iso_para_datetime(fim_iso)
+    if fim - inicio <= duracao_minima:
+        return None
+    meio = inicio + (fim - inicio) / 2
+    meio = meio.replace(microsecond=meio.microsecond // 1000 * 1000)
+    return [
+        (inicio_iso, datetime_para_iso(meio)),
+        (datetime_para_iso(meio + timedelta(milliseconds=1)), fim_iso)
+    ]
+
+def decodificar_json(conteudo):
+    """Decodifica o corpo JSON com orjson quando disponível (bytes ou str)"""
+    if orjson is not None:
+        return orjson.loads(conteudo)
+    return json.loads(conteudo)
+
+# Arquivos de estado (ajustador, índice do cache, marcas d'água, sessões) gravados por várias threads/contas
+_lock_gravacao_estado = threading.RLock()
+
+def temporario_ao_lado(caminho):
+    """Arquivo temporário único (vazio, modo 0600) na pasta de `caminho`, pronto para um os.replace atômico"""
+    pasta = os.path.dirname(caminho) or "."
+    os.makedirs(pasta, exist_ok=True)
+    descritor, temporario = tempfile.mkstemp(dir=pasta, prefix=os.path.basename(caminho) + ".", suffix=".tmp")
+    os.close(descritor)
+    return temporario
+
+def gravar_atomico(caminho, conteudo: bytes):
+    """Grava num temporário único e troca com os.replace, sob o lock de estado do processo"""
+    with _lock_gravacao_estado:
+        temporario = temporario_ao_lado(caminho)
+        try:
+            with open(temporario, "wb") as f:
+                f.write(conteudo)
+            os.replace(temporario, caminho)
+        except BaseException:
+            try:
+                os.remove(temporario)
+            except OSError:
+                pass
+            raise
+
+def gravar_json_atomico(caminho, dados, **opcoes):
+    """Versão JSON de gravar_atomico (opções repassadas ao json.dumps)"""
+    gravar_atomico(caminho, json.dumps(dados, **opcoes).encode("utf-8"))
+
+def registros_para_dataframe(rows) -> "pd.DataFrame":
+    """Monta o DataFrame coluna a coluna; json_normalize só entra se houver campo aninhado"""
+    colunas = {}
+    for row in rows:
+        for chave, valor in row.items():
+            if isinstance(valor, dict):
+                # Objeto aninhado: json_normalize achata em colunas "pai.filho"
+                return pd.json_normalize(rows)
+            colunas[chave] = None
+    return pd.DataFrame({chave: [row.get(chave) for row in rows] for chave in colunas}, columns=list(colunas))
+
+def extrair_token_json(obj, profundidade=2):
+    """Procura um JWT nos campos usuais de token de uma resposta JSON (também em objetos aninhados)"""
+    if not isinstance(obj, dict) or profundidade < 0:
+        return None
+    for cand in ["token", "access_token", "accessToken", "jwt", "auth", "authorization"]:
+        valor = obj.get(cand)
+        if isinstance(valor, str) and is_jwt(valor):
+            return valor
+    for valor in obj.values():
+        token = extrair_token_json(valor, profundidade - 1)
+        if token:
+            return token
+    return None
+
+def cookies_requests_para_lista(jar):
+    """Converte o cookie jar do requests para a lista de dicts do Selenium (formato do cache de sessão)"""
+    return [{"name": c.name, "value": c.value, "domain": c.domain, "path": c.path or "/"} for c in jar]
+
 def cookies_selenium_para_requests(cookies_selenium, target_domain: str):
     """Converte cookies do Selenium para formato do requests"""
     jar = requests.cookies.RequestsCookieJar()
@@ -251,33 +531,1165 @@ def cookies_selenium_para_requests(cookies_selenium, target_domain: str):
         jar.set(name, value, domain=domain, path=path)
     return jar
 
+# =============================================================================
+# LIMITADOR DE TAXA (TOKEN BUCKET) COMPARTILHADO
+# =============================================================================
+class LimitadorTaxa:
+    """Token bucket thread-safe: taxa em requisições/s com rajada; reduz à metade a cada 429"""
+    
+    def __init__(self, taxa=LIMITE_REQUISICOES_S, rajada=LIMITE_RAJADA, taxa_minima=LIMITE_TAXA_MINIMA,
+                 recuperacao=LIMITE_RECUPERACAO, logger=None):
+        self.taxa_configurada = taxa
+        self.taxa = taxa
+        self.rajada = max(rajada, 1)
+        self.taxa_minima = taxa_minima
+        self.recuperacao = recuperacao
+        self.logger = logger or logging.getLogger('ETL-API')
+        self._lock = threading.Lock()
+        self._fichas = float(self.rajada)
+        self._ultimo = time.monotonic()
+        self.metricas = {"esperas": 0, "tempo_espera": 0.0, "reducoes": 0}
+    
+    @property
+    def ativo(self):
+        return bool(self.taxa_configurada and self.taxa_configurada > 0)
+    
+    def _reservar(self):
+        """Reserva uma ficha e retorna quanto tempo esperar por ela"""
+        with self._lock:
+            agora = time.monotonic()
+            self._fichas = min(self.rajada, self._fichas + (agora - self._ultimo) * self.taxa)
+            self._ultimo = agora
+            self._fichas -= 1
+            espera = -self._fichas / self.taxa if self._fichas < 0 else 0.0
+            if espera:
+                self.metricas["esperas"] += 1
+                self.metricas["tempo_espera"] += espera
+            return espera
+    
+    def adquirir(self):
+        """Bloqueia até haver ficha; retorna os segundos esperados"""
+        if not self.ativo:
+            return 0.0
+        espera = self._reservar()
+        if espera:
+            time.sleep(espera)
+        return espera
+    
+    async def adquirir_async(self):
+        """Versão asyncio de adquirir (não bloqueia o event loop)"""
+        if not self.ativo:
+            return 0.0
+        espera = self._reservar()
+        if espera:
+            await asyncio.sleep(espera)
+        return espera
+    
+    def reduzir(self):
+        """429 recebido: corta a taxa pela metade (até a taxa mínima)"""
+        if not self.ativo:
+            return
+        with self._lock:
+            nova = max(self.taxa / 2, self.taxa_minima)
+            if nova < self.taxa:
+                self.metricas["reducoes"] += 1
+                self.logger.warning(f"🐢 429 recebido - limitador reduzido para {nova:.2f} req/s")
+            self.taxa = nova
+    
+    def recuperar(self):
+        """Resposta bem-sucedida: volta aos poucos para a taxa configurada"""
+        if not self.ativo or self.taxa >= self.taxa_configurada:
+            return
+        with self._lock:
+            self.taxa = min(self.taxa + self.recuperacao, self.taxa_configurada)
+    
+    def resumo(self):
+        with self._lock:
+            return dict(self.metricas, taxa_atual=self.taxa)
+
+_limitador_processo = None
+_lock_limitador = threading.Lock()
+
+_orcamento_processo = None
+
+def orcamento_concorrencia():
+    """Semáforo único do processo: teto de requisições em voo somando todas as sessões"""
+    global _orcamento_processo
+    with _lock_limitador:
+        if _orcamento_processo is None:
+            _orcamento_processo = threading.BoundedSemaphore(max(API_CONCORRENCIA_GLOBAL, 1))
+        return _orcamento_processo
+
+# Login no navegador e prompt manual de 2FA: um por vez no processo (workers do pool reautenticando juntos)
+_lock_login_interativo = threading.RLock()
+
+def limitador_compartilhado():
+    """Limitador único do processo: todas as sessões, threads e tasks dividem o mesmo bucket"""
+    global _limitador_processo
+    with _lock_limitador:
+        if _limitador_processo is None:
+            _limitador_processo = LimitadorTaxa(taxa=LIMITE_REQUISICOES_S, rajada=LIMITE_RAJADA)
+        return _limitador_processo
+
+# =============================================================================
+# TRANSPORTE HTTP DA API (POOL, COMPRESSÃO, RETRY E MÉTRICAS)
+# =============================================================================
+class TransporteAPI(requests.Session):
+    """Sessão requests com pool dimensionado, compressão, retry com backoff e métricas"""
+    STATUS_TRANSITORIOS = {429, 500, 502, 503, 504}
+    
+    def __init__(self, pool_size=API_WORKERS, tentativas=TRANSPORTE_TENTATIVAS,
+                 backoff_base=TRANSPORTE_BACKOFF_BASE, backoff_max=TRANSPORTE_BACKOFF_MAX, limitador=None, orcamento=None,
+                 logger=None):
+        super().__init__()
+        self.logger = logger or logging.getLogger('ETL-API')
+        self.limitador = limitador or limitador_compartilhado()
+        self.orcamento = orcamento or orcamento_concorrencia()
+        self.tentativas = max(tentativas, 0)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        
+        # 🔧 SOLUÇÃO SSL: Desativa verificação de certificado
+        self.verify = False
+        
+        # Pool de conexões keep-alive dimensionado para os workers concorrentes
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=max(pool_size, 1), max_retries=0)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+        self.headers["Accept-Encoding"] = "gzip, deflate"
+        self.headers["Connection"] = "keep-alive"
+        
+        self._lock_metricas = threading.Lock()
+        self.metricas = {"requisicoes": 0, "retries": 0, "bytes_rede": 0, "bytes_conteudo": 0,
+                         "espera_limitador": 0.0, "tempo_rede": 0.0}
+        self.latencias = []
+    
+    def request(self, method, url, **kwargs):
+        """Envia a requisição repetindo 429/5xx/timeouts com backoff exponencial + jitter"""
+        for tentativa in range(self.tentativas + 1):
+            espera_limitador = self.limitador.adquirir()
+            with self._lock_metricas:
+                self.metricas["espera_limitador"] += espera_limitador
+            
+            inicio = time.perf_counter()
+            try:
+                with self.orcamento:
+                    resp = super().request(method, url, **kwargs)
+            except requests.exceptions.SSLError:
+                raise
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                if tentativa >= self.tentativas:
+                    raise
+                espera = self._backoff(tentativa)
+                self.logger.warning(f"⚠️  {type(e).__name__} - nova tentativa em {espera:.1f}s "
+                                    f"({tentativa + 1}/{self.tentativas})")
+            else:
+                self._registrar_resposta(resp, time.perf_counter() - inicio)
+                if resp.status_code == 429:
+                    self.limitador.reduzir()
+                elif resp.status_code < 400:
+                    self.limitador.recuperar()
+                if resp.status_code not in self.STATUS_TRANSITORIOS or tentativa >= self.tentativas:
+                    return resp
+                espera = self._retry_after(resp)
+                if espera is None:
+                    espera = self._backoff(tentativa)
+                self.logger.warning(f"⚠️  HTTP {resp.status_code} - nova tentativa em {espera:.1f}s "
+                                    f"({tentativa + 1}/{self.tentativas})")
+                resp.close()
+            
+            with self._lock_metricas:
+                self.metricas["retries"] += 1
+            time.sleep(espera)
+    
+    def _backoff(self, tentativa):
+        """Backoff exponencial com jitter completo"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** tentativa)))
+    
+    @staticmethod
+    def _retry_after(resp):
+        """Lê o Retry-After (segundos ou data HTTP); None se ausente ou inválido"""
+        valor = resp.headers.get("Retry-After")
+        if not valor:
+            return None
+        try:
+            return min(max(float(valor), 0.0), TRANSPORTE_RETRY_AFTER_MAX)
+        except ValueError:
+            pass
+        try:
+            data = email.utils.parsedate_to_datetime(valor)
+            return min(max((data - datetime.now(data.tzinfo)).total_seconds(), 0.0), TRANSPORTE_RETRY_AFTER_MAX)
+        except (TypeError, ValueError):
+            return None
+    
+    def _registrar_resposta(self, resp, latencia):
+        """Contabiliza latência e bytes trafegados (comprimidos) vs. conteúdo decodificado"""
+        bytes_conteudo = len(resp.content)
+        try:
+            bytes_rede = resp.raw.tell()
+        except (AttributeError, OSError):
+            bytes_rede = 0
+        if not bytes_rede:
+            bytes_rede = int(resp.headers.get("Content-Length") or bytes_conteudo)
+        
+        with self._lock_metricas:
+            self.metricas["requisicoes"] += 1
+            self.metricas["bytes_rede"] += bytes_rede
+            self.metricas["bytes_conteudo"] += bytes_conteudo
+            self.metricas["tempo_rede"] += latencia
+            self.latencias.append(latencia)
+    
+    def resumo_metricas(self):
+        """Retorna contadores e percentis de latência das requisições feitas"""
+        with self._lock_metricas:
+            resumo = dict(self.metricas)
+            latencias = sorted(self.latencias)
+        
+        if latencias:
+            resumo["latencia_p50"] = latencias[len(latencias) // 2]
+            resumo["latencia_p95"] = latencias[min(int(len(latencias) * 0.95), len(latencias) - 1)]
+            resumo["latencia_max"] = latencias[-1]
+        if resumo["bytes_rede"]:
+            resumo["taxa_compressao"] = resumo["bytes_conteudo"] / resumo["bytes_rede"]
+        return resumo
+    
+    def registrar_metricas(self):
+        """Loga o resumo das métricas de transporte"""
+        resumo = self.resumo_metricas()
+        if not resumo["requisicoes"]:
+            return
+        self.logger.info(
+            f"📡 Transporte: {resumo['requisicoes']} requisições, {resumo['retries']} retries, "
+            f"{resumo['bytes_rede'] / 1024 / 1024:.1f} MB na rede / "
+            f"{resumo['bytes_conteudo'] / 1024 / 1024:.1f} MB decodificados "
+            f"(compressão {resumo.get('taxa_compressao', 1):.1f}x), "
+            f"latência p50 {resumo['latencia_p50']:.2f}s / p95 {resumo['latencia_p95']:.2f}s"
+        )
+        if self.limitador.ativo:
+            limitador = self.limitador.resumo()
+            self.logger.info(
+                f"⏳ Limitador: {resumo['espera_limitador']:.1f}s esperando vs {resumo['tempo_rede']:.1f}s na rede "
+                f"({limitador['reducoes']} redução(ões) por 429, taxa atual {limitador['taxa_atual']:.2f} req/s)"
+            )
+
+# =============================================================================
+# TAMANHO DE PÁGINA ADAPTATIVO
+# =============================================================================
+class AjustadorTamanhoPagina:
+    """Ajusta o size das páginas rumo ao melhor registros/s sem passar do teto de latência"""
+    ALFA = 0.3  # Peso da observação mais recente na média móvel
+    
+    def __init__(self, caminho, endpoint, tamanho_inicial=DEFAULT_PAGE_SIZE, minimo=PAGINA_TAMANHO_MIN,
+                 maximo=PAGINA_TAMANHO_MAX, latencia_max=PAGINA_LATENCIA_MAX, logger=None):
+        self.caminho = caminho
+        self.endpoint = endpoint
+        self.minimo = minimo
+        self.maximo = maximo
+        self.latencia_max = latencia_max
+        self.logger = logger or logging.getLogger('ETL-API')
+        self._lock = threading.Lock()
+        
+        salvo = self._carregar().get(endpoint, {})
+        # Histórico por tamanho: médias móveis de registros/s, latência e bytes
+        self.historico = {int(k): v for k, v in salvo.get("historico", {}).items()}
+        self.tamanho = min(max(int(salvo.get("tamanho", tamanho_inicial)), minimo), maximo)
+        if salvo:
+            self.logger.info(f"📐 Tamanho de página ajustado anteriormente: {self.tamanho}")
+    
+    def _carregar(self):
+        if not os.path.exists(self.caminho):
+            return {}
+        try:
+            with open(self.caminho, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def registrar(self, tamanho, registros, latencia, bytes_resposta):
+        """Registra a observação de uma página buscada com o tamanho informado"""
+        if latencia <= 0 or not registros:
+            return
+        with self._lock:
+            obs = self.historico.setdefault(tamanho, {"registros_s": 0.0, "latencia": 0.0, "bytes": 0.0, "amostras": 0})
+            # Página incompleta (a última) não representa a vazão do tamanho, só a latência
+            valores = {"latencia": latencia, "bytes": bytes_resposta * tamanho / registros}
+            if registros >= tamanho:
+                valores["registros_s"] = registros / latencia
+            for campo, valor in valores.items():
+                obs[campo] = valor if not obs["amostras"] else (1 - self.ALFA) * obs[campo] + self.ALFA * valor
+            obs["amostras"] += 1
+    
+    def proximo_tamanho(self, offset=None, tamanho_em_uso=None):
+        """Escolhe o próximo size; com offset, só troca se o offset continuar alinhado à página
+        
+        tamanho_em_uso é o size que o chamador vem usando: se o tamanho escolhido (talvez por outro
+        job que divide o ajustador) não divide o offset, o chamador continua com ele.
+        """
+        with self._lock:
+            atual = self.historico.get(self.tamanho)
+            if not atual or not atual["amostras"]:
+                return self.tamanho
+            
+            maior, menor = self.tamanho * 2, self.tamanho // 2
+            obs_maior = self.historico.get(maior)
+            obs_menor = self.historico.get(menor)
+            candidato = self.tamanho
+            
+            if atual["latencia"] > self.latencia_max:
+                # Passou do teto: encolhe
+                if menor >= self.minimo and self.tamanho % 2 == 0:
+                    candidato = menor
+            elif obs_menor and obs_menor["registros_s"] > atual["registros_s"]:
+                candidato = menor
+            elif maior <= self.maximo and atual["latencia"] * 2 <= self.latencia_max:
+                # Cresce enquanto houver folga de latência e o maior não se mostrou pior
+                if not obs_maior or obs_maior["registros_s"] > atual["registros_s"]:
+                    candidato = maior
+            
+            if candidato != self.tamanho and (offset is None or offset % candidato == 0):
+                self.logger.info(f"📐 Tamanho de página: {self.tamanho} → {candidato}")
+                self.tamanho = candidato
+            if offset is not None and tamanho_em_uso and offset % self.tamanho:
+                # Página offset // tamanho recomeçaria antes do offset e repetiria registros
+                return tamanho_em_uso
+            return self.tamanho
+    
+    def salvar(self):
+        """Persiste o tamanho escolhido e o histórico deste endpoint (falha só gera aviso)"""
+        # Ler-mesclar-gravar sob o lock do processo: outros endpoints/contas usam o mesmo arquivo
+        with self._lock, _lock_gravacao_estado:
+            dados = self._carregar()
+            dados[self.endpoint] = {
+                "tamanho": self.tamanho,
+                "historico": {str(k): v for k, v in self.historico.items()},
+                "atualizado_em": datetime.now().isoformat(timespec="seconds")
+            }
+            try:
+                gravar_json_atomico(self.caminho, dados, ensure_ascii=False, indent=2)
+            except OSError as e:
+                self.logger.warning(f"⚠️  Não foi possível gravar o tamanho de página: {e}")
+
+# =============================================================================
+# GRAVAÇÃO INCREMENTAL DO RELATÓRIO (STREAMING)
+# =============================================================================
+class EscritorRelatorio:
+    """Grava o relatório página a página (CSV ou Parquet) sem acumular tudo em memória"""
+    def __init__(self, caminho, formato=FORMATO_SAIDA, logger=None):
+        if formato == "parquet" and pq is None:
+            raise ValueError("Formato parquet requer pyarrow (pip install pyarrow)")
+        if formato not in ("csv", "parquet"):
+            raise ValueError(f"Formato de saída inválido: {formato}")
+        
+        self.caminho = caminho
+        self.formato = formato
+        self.logger = logger or logging.getLogger('ETL-API')
+        self.colunas = None
+        self.total_registros = 0
+        self._arquivo = None
+        self._parquet = None
+        self._schema = None
+        self._layout_alargado = False
+        self._partes = []  # Parquet: um arquivo por layout (o 1º já é o caminho final)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.fechar()
+        return False
+    
+    def escrever(self, rows):
+        """Achata uma página de registros e anexa ao arquivo de saída"""
+        if not rows:
+            return 0
+        
+        df = registros_para_dataframe(rows)
+        
+        novas = []
+        if self.colunas is None:
+            # A primeira página define o layout inicial do arquivo
+            self.colunas = list(df.columns)
+        else:
+            novas = [c for c in df.columns if c not in self.colunas]
+            if novas:
+                # Colunas novas entram no fim do layout; as linhas anteriores ficam vazias nelas
+                self.colunas.extend(novas)
+                self._layout_alargado = True
+                self.logger.info(f"➕ Layout do relatório alargado com: {novas}")
+            df = df.reindex(columns=self.colunas)
+        
+        if self.formato == "csv":
+            primeira = self._arquivo is None
+            if primeira:
+                self._arquivo = open(self.caminho, "w", encoding="utf-8-sig", newline="")
+            df.to_csv(self._arquivo, index=False, header=primeira)
+        else:
+            self._escrever_parquet(df, novas)
+        
+        self.total_registros += len(df)
+        return len(df)
+    
+    def _escrever_parquet(self, df, novas):
+        """Anexa um row group ao arquivo Parquet (colunas novas abrem uma parte com o schema alargado)"""
+        if self._parquet is not None and novas:
+            self._parquet.close()
+            self._parquet = None
+        if self._parquet is None:
+            schema = pa.Schema.from_pandas(df, preserve_index=False)
+            # Colunas totalmente nulas na página viram texto
+            campos = [pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f for f in schema]
+            if self._schema is not None:
+                # Mantém os tipos já gravados e acrescenta só os campos novos
+                campos = list(self._schema) + [f for f in campos if f.name not in self._schema.names]
+            self._schema = pa.schema(campos)
+            parte = f"{self.caminho}.parte{len(self._partes)}" if self._partes else self.caminho
+            self._partes.append(parte)
+            self._parquet = pq.ParquetWriter(parte, self._schema)
+        tabela = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False, safe=False)
+        self._parquet.write_table(tabela)
+    
+    def _reescrever_csv(self):
+        """Reescreve o CSV com o cabeçalho final, completando as linhas gravadas antes do alargamento"""
+        temporario = temporario_ao_lado(self.caminho)
+        largura = len(self.colunas)
+        with open(self.caminho, "r", encoding="utf-8-sig", newline="") as origem, \
+                open(temporario, "w", encoding="utf-8-sig", newline="") as destino:
+            leitor = csv.reader(origem)
+            escritor = csv.writer(destino, lineterminator=os.linesep)
+            next(leitor, None)
+            escritor.writerow(self.colunas)
+            for linha in leitor:
+                escritor.writerow(linha + [""] * (largura - len(linha)))
+        os.replace(temporario, self.caminho)
+    
+    def _unir_partes_parquet(self):
+        """Junta as partes Parquet no arquivo final, preenchendo com nulos as colunas que faltam"""
+        temporario = temporario_ao_lado(self.caminho)
+        with pq.ParquetWriter(temporario, self._schema) as escritor:
+            for parte in self._partes:
+                with open(parte, "rb") as f:
+                    for lote in pq.ParquetFile(f).iter_batches():
+                        tabela = pa.Table.from_batches([lote])
+                        for campo in self._schema:
+                            if campo.name not in tabela.column_names:
+                                tabela = tabela.append_column(campo, pa.nulls(len(tabela), campo.type))
+                        escritor.write_table(tabela.select(self._schema.names))
+        os.replace(temporario, self.caminho)
+        for parte in self._partes[1:]:
+            os.remove(parte)
+        self._partes = [self.caminho]
+    
+    def fechar(self):
+        """Fecha o arquivo (ajustando o layout se ele cresceu); remove-o se nenhuma linha foi gravada"""
+        if self._arquivo is not None:
+            self._arquivo.close()
+            self._arquivo = None
+            if self._layout_alargado and self.total_registros:
+                self._reescrever_csv()
+        if self._parquet is not None:
+            self._parquet.close()
+            self._parquet = None
+            if len(self._partes) > 1:
+                self._unir_partes_parquet()
+        self._layout_alargado = False
+        if self.total_registros == 0 and os.path.exists(self.caminho):
+            os.remove(self.caminho)
+
+# =============================================================================
+# CACHE DE RESPOSTAS DA API
+# =============================================================================
+class CacheRespostas:
+    """Cache em disco das respostas da API, endereçado pelo hash dos parâmetros + conta
+    
+    Entradas gravadas com gzip; períodos fechados vivem CACHE_TTL_FECHADO, o mês corrente
+    só CACHE_TTL_ABERTO. Passando de max_bytes, sai a entrada usada há mais tempo (LRU).
+    """
+    
+    def __init__(self, pasta, max_bytes=CACHE_MAX_BYTES, logger=None):
+        self.pasta = pasta
+        self.max_bytes = max_bytes
+        self.logger = logger or logging.getLogger('ETL-API')
+        self.caminho_indice = os.path.join(pasta, "index.json")
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        os.makedirs(pasta, exist_ok=True)
+        self.indice = self._carregar()
+        self._remover_orfaos()
+    
+    def _remover_orfaos(self):
+        """Apaga .gz que não estão no índice (deixados por execuções que perderam o índice)"""
+        for raiz, _, arquivos in os.walk(self.pasta):
+            for nome in arquivos:
+                if nome.endswith(".gz") and nome[:-3] not in self.indice:
+                    try:
+                        os.remove(os.path.join(raiz, nome))
+                    except OSError:
+                        pass
+    
+    def _carregar(self):
+        if not os.path.exists(self.caminho_indice):
+            return {}
+        try:
+            with open(self.caminho_indice, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    @staticmethod
+    def chave(params, conta):
+        serializado = json.dumps({"conta": conta, "params": params}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(serializado.encode("utf-8")).hexdigest()
+    
+    @staticmethod
+    def ttl_para(fim_iso):
+        """TTL longo para períodos que terminam antes do mês corrente, curto para o resto"""
+        inicio_mes = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        try:
+            fechado = iso_para_datetime(fim_iso) < inicio_mes
+        except ValueError:
+            fechado = False
+        return CACHE_TTL_FECHADO if fechado else CACHE_TTL_ABERTO
+    
+    def _arquivo(self, chave):
+        return os.path.join(self.pasta, chave[:2], chave + ".gz")
+    
+    def obter(self, chave):
+        """Retorna (conteúdo, content-type) ou None se ausente/expirado"""
+        with self._lock:
+            item = self.indice.get(chave)
+            if item is None or item["expira_em"] < time.time():
+                self.falhas += 1
+                return None
+            try:
+                with open(self._arquivo(chave), "rb") as f:
+                    conteudo = gzip.decompress(f.read())
+            except OSError:
+                self.indice.pop(chave, None)
+                self.falhas += 1
+                return None
+            item["acesso"] = time.time()
+            self.acertos += 1
+            return conteudo, item["content_type"]
+    
+    def guardar(self, chave, conteudo, content_type, ttl):
+        """Grava a resposta comprimida e despeja as menos usadas se passar do limite"""
+        comprimido = gzip.compress(conteudo)
+        arquivo = self._arquivo(chave)
+        os.makedirs(os.path.dirname(arquivo), exist_ok=True)
+        with open(arquivo, "wb") as f:
+            f.write(comprimido)
+        
+        with self._lock:
+            agora = time.time()
+            self.indice[chave] = {
+                "tamanho": len(comprimido),
+                "content_type": content_type,
+                "expira_em": agora + ttl,
+                "acesso": agora
+            }
+            self._despejar()
+    
+    def _despejar(self):
+        total = sum(item["tamanho"] for item in self.indice.values())
+        if total <= self.max_bytes:
+            return
+        for chave in sorted(self.indice, key=lambda c: self.indice[c]["acesso"]):
+            if total <= self.max_bytes:
+                break
+            total -= self.indice.pop(chave)["tamanho"]
+            try:
+                os.remove(self._arquivo(chave))
+            except OSError:
+                pass
+    
+    def salvar(self):
+        """Grava o índice (acessos/expirações) e descarta as entradas vencidas"""
+        with self._lock:
+            agora = time.time()
+            for chave in [c for c, item in self.indice.items() if item["expira_em"] < agora]:
+                self.indice.pop(chave)
+                try:
+                    os.remove(self._arquivo(chave))
+                except OSError:
+                    pass
+            try:
+                gravar_json_atomico(self.caminho_indice, self.indice)
+            except OSError as e:
+                self.logger.warning(f"⚠️  Não foi possível gravar o índice do cache de respostas: {e}")
+    
+    def registrar_metricas(self):
+        consultas = self.acertos + self.falhas
+        if consultas:
+            self.logger.info(f"🗄️  Cache de respostas: {self.acertos}/{consultas} acertos "
+                             f"({100 * self.acertos / consultas:.0f}%)")
+        self.salvar()
+
+_caches_respostas = {}
+
+def cache_respostas_compartilhado(pasta, logger=None):
+    """Um CacheRespostas por pasta no processo: as contas do pool dividem o mesmo índice em memória
+    
+    Com uma instância por conta, o último salvar() sobrescreveria as entradas das outras e os
+    .gz delas ficariam fora do índice (e do limite CACHE_MAX_BYTES) para sempre.
+    """
+    pasta = os.path.abspath(pasta)
+    with _lock_limitador:
+        if pasta not in _caches_respostas:
+            _caches_respostas[pasta] = CacheRespostas(pasta, logger=logger)
+        return _caches_respostas[pasta]
+
+# =============================================================================
+# SPOOL DE PÁGINAS (DOWNLOAD RETOMÁVEL)
+# =============================================================================
+class SpoolPaginas:
+    """Checkpoint em disco de cada página baixada, com manifesto para retomar a execução"""
+    
+    def __init__(self, pasta, parametros, logger=None):
+        self.logger = logger or logging.getLogger('ETL-API')
+        self._lock = threading.Lock()
+        
+        serializado = json.dumps(parametros, sort_keys=True, ensure_ascii=False, default=str)
+        self.params_hash = hashlib.sha256(serializado.encode("utf-8")).hexdigest()
+        self.pasta = os.path.join(pasta, self.params_hash[:16])
+        self.caminho_manifesto = os.path.join(self.pasta, "manifest.json")
+        os.makedirs(self.pasta, exist_ok=True)
+        
+        self.manifesto = self._carregar()
+        if self.manifesto.get("params_hash") != self.params_hash:
+            self.manifesto = {"params_hash": self.params_hash, "params": parametros, "size": None, "paginas": {}}
+        elif self.manifesto["paginas"]:
+            registros = sum(item["registros"] for item in self.manifesto["paginas"].values())
+            self.logger.info(f"♻️  Spool encontrado: {len(self.manifesto['paginas'])} página(s), "
+                             f"{registros} registros já baixados - retomando")
+    
+    def _carregar(self):
+        if not os.path.exists(self.caminho_manifesto):
+            return {}
+        try:
+            with open(self.caminho_manifesto, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            self.logger.warning("⚠️  Manifesto do spool ilegível - recomeçando do zero")
+            return {}
+    
+    def _salvar_manifesto(self):
+        gravar_json_atomico(self.caminho_manifesto, self.manifesto, ensure_ascii=False, indent=2)
+    
+    def fixar_tamanho(self, size):
+        """Usa o size da execução interrompida (as chaves das páginas dependem dele)"""
+        with self._lock:
+            if not self.manifesto.get("size"):
+                self.manifesto["size"] = size
+                self._salvar_manifesto()
+            return self.manifesto["size"]
+    
+    @staticmethod
+    def chave(inicio_iso, fim_iso, page, size):
+        return f"{inicio_iso}|{fim_iso}|{page}|{size}"
+    
+    def obter(self, chave):
+        """Página guardada no spool (None se ausente ou corrompida)"""
+        item = self.manifesto["paginas"].get(chave)
+        if item is None:
+            return None
+        try:
+            with open(os.path.join(self.pasta, item["arquivo"]), "rb") as f:
+                conteudo = f.read()
+            if hashlib.sha256(conteudo).hexdigest() != item["checksum"]:
+                raise ValueError("checksum divergente")
+            pagina = decodificar_json(gzip.decompress(conteudo))
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"⚠️  Página {item['page'] + 1} do spool descartada ({e})")
+            with self._lock:
+                self.manifesto["paginas"].pop(chave, None)
+            return None
+        
+        # Página vinda do disco: sem custo de rede
+        pagina["latencia"] = 0.0
+        pagina["bytes"] = 0
+        return pagina
+    
+    def guardar(self, chave, pagina):
+        """Grava a página (gzip) e registra no manifesto"""
+        dados = {campo: valor for campo, valor in pagina.items() if campo not in ("latencia", "bytes")}
+        conteudo = gzip.compress(json.dumps(dados, ensure_ascii=False, default=str).encode("utf-8"))
+        arquivo = hashlib.sha256(chave.encode("utf-8")).hexdigest()[:24] + ".json.gz"
+        
+        with open(os.path.join(self.pasta, arquivo), "wb") as f:
+            f.write(conteudo)
+        with self._lock:
+            self.manifesto["paginas"][chave] = {
+                "page": pagina["page"],
+                "registros": len(pagina["rows"]),
+                "checksum": hashlib.sha256(conteudo).hexdigest(),
+                "arquivo": arquivo
+            }
+            self._salvar_manifesto()
+    
+    def descartar(self):
+        """Remove o spool depois que o arquivo final foi montado por completo"""
+        shutil.rmtree(self.pasta, ignore_errors=True)
+    
+    @staticmethod
+    def limpar_expirados(pasta, validade=SPOOL_VALIDADE, logger=None):
+        """Apaga os spools cujo manifesto não é atualizado há mais que `validade`"""
+        if not os.path.isdir(pasta):
+            return
+        limite = time.time() - validade.total_seconds()
+        for nome in os.listdir(pasta):
+            spool = os.path.join(pasta, nome)
+            manifesto = os.path.join(spool, "manifest.json")
+            try:
+                modificado = os.path.getmtime(manifesto if os.path.exists(manifesto) else spool)
+            except OSError:
+                continue
+            if modificado < limite:
+                shutil.rmtree(spool, ignore_errors=True)
+                if logger:
+                    logger.info(f"🧹 Spool expirado removido: {nome}")
+
+# =============================================================================
+# MARCA D'ÁGUA (HIGH-WATER MARK) PARA EXTRAÇÃO INCREMENTAL
+# =============================================================================
+class WatermarkStore:
+    """Guarda a última marca d'água por conta e conjunto de filtros em um arquivo JSON"""
+    def __init__(self, caminho, logger=None):
+        self.caminho = caminho
+        self.logger = logger or logging.getLogger('ETL-API')
+        # Uma instância por chamada: o lock precisa ser o do processo para valer entre as contas do pool
+        self._lock = _lock_gravacao_estado
+    
+    @staticmethod
+    def chave(conta, filtros):
+        """Identificador estável da conta + filtros (filtros vazios são ignorados)"""
+        filtros_ativos = {k: v for k, v in sorted((filtros or {}).items()) if v not in (None, "")}
+        texto = json.dumps({"conta": conta, "filtros": filtros_ativos}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha1(texto.encode("utf-8")).hexdigest()[:16]
+    
+    def _carregar(self):
+        if not os.path.exists(self.caminho):
+            return {}
+        try:
+            with open(self.caminho, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"⚠️  Marcas d'água ilegíveis, ignorando: {e}")
+            return {}
+    
+    def obter(self, conta, filtros):
+        """Retorna a marca d'água salva ou None"""
+        with self._lock:
+            return self._carregar().get(self.chave(conta, filtros))
+    
+    def salvar(self, conta, filtros, marca):
+        """Grava a marca d'água de forma atômica (temporário único + replace) - False se não conseguiu"""
+        with self._lock:
+            dados = self._carregar()
+            dados[self.chave(conta, filtros)] = dict(
+                marca,
+                conta=conta,
+                filtros={k: v for k, v in (filtros or {}).items() if v not in (None, "")},
+                atualizado_em=datetime.now().isoformat(timespec="seconds")
+            )
+            try:
+                gravar_json_atomico(self.caminho, dados, ensure_ascii=False, indent=2)
+            except OSError as e:
+                self.logger.error(f"❌ Não foi possível gravar a marca d'água: {e}")
+                return False
+            return True
+
+# =============================================================================
+# CACHE DE SESSÃO (TOKEN JWT + COOKIES) CRIPTOGRAFADO EM DISCO
+# =============================================================================
+class SessaoCache:
+    """Guarda token/cookies por conta, criptografados com Fernet, até o exp do JWT"""
+    def __init__(self, pasta, logger=None):
+        self.pasta = pasta
+        self.logger = logger or logging.getLogger('ETL-API')
+        os.makedirs(self.pasta, exist_ok=True)
+        self._fernet = self._criar_fernet()
+    
+    @property
+    def ativo(self):
+        return self._fernet is not None
+    
+    def _criar_fernet(self):
+        """Usa a chave de UNIPIX_SESSAO_CHAVE ou gera uma chave local (permissão 600)"""
+        if criptografia is None:
+            self.logger.warning("⚠️  Cache de sessão desativado: requer cryptography (pip install cryptography)")
+            return None
+        
+        chave = os.environ.get("UNIPIX_SESSAO_CHAVE")
+        if not chave:
+            caminho_chave = os.path.join(self.pasta, ".sessao.key")
+            if os.path.exists(caminho_chave):
+                with open(caminho_chave, "rb") as f:
+                    chave = f.read().strip()
+            else:
+                chave = criptografia.Fernet.generate_key()
+                fd = os.open(caminho_chave, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+                with os.fdopen(fd, "wb") as f:
+                    f.write(chave)
+        
+        try:
+            return criptografia.Fernet(chave)
+        except ValueError as e:
+            self.logger.warning(f"⚠️  Chave do cache de sessão inválida, cache desativado: {e}")
+            return None
+    
+    def _caminho(self, conta):
+        nome = hashlib.sha1(conta.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.pasta, f"sessao_{nome}.bin")
+    
+    def carregar(self, conta):
+        """Retorna {"token", "cookies", "expira_em"} se houver sessão válida em cache"""
+        caminho = self._caminho(conta)
+        if not self.ativo or not os.path.exists(caminho):
+            return None
+        
+        try:
+            with open(caminho, "rb") as f:
+                dados = json.loads(self._fernet.decrypt(f.read()))
+        except (OSError, ValueError, criptografia.InvalidToken) as e:
+            self.logger.warning(f"⚠️  Sessão em cache ilegível, ignorando: {e}")
+            return None
+        
+        restante = dados.get("expira_em", 0) - time.time()
+        if restante <= SESSAO_MARGEM_EXPIRACAO:
+            self.logger.info("⌛ Sessão em cache expirada")
+            return None
+        
+        self.logger.info(f"♻️  Sessão em cache válida por mais {restante / 60:.0f} min")
+        return dados
+    
+    def salvar(self, conta, token, cookies):
+        """Criptografa e grava a sessão; a validade vem do exp do JWT (ou dos cookies)"""
+        if not self.ativo:
+            return False
+        
+        expira_em = jwt_expiracao(token) if token else None
+        if expira_em is None:
+            validades = [c["expiry"] for c in cookies or [] if c.get("expiry")]
+            expira_em = min(validades) if validades else None
+        if expira_em is None:
+            self.logger.info("ℹ️  Sessão sem expiração conhecida - não será guardada em cache")
+            return False
+        
+        dados = {
+            "conta": conta,
+            "token": token,
+            "cookies": cookies or [],
+            "expira_em": expira_em,
+            "salvo_em": time.time()
+        }
+        
+        try:
+            # mkstemp cria o temporário com modo 0600
+            gravar_atomico(self._caminho(conta), self._fernet.encrypt(json.dumps(dados).encode("utf-8")))
+        except OSError as e:
+            self.logger.warning(f"⚠️  Não foi possível guardar a sessão em cache: {e}")
+            return False
+        
+        self.logger.info(f"🔒 Sessão guardada em cache até {datetime.fromtimestamp(expira_em):%d/%m/%Y %H:%M}")
+        return True
+    
+    def invalidar(self, conta):
+        """Remove a sessão da conta do cache"""
+        caminho = self._caminho(conta)
+        if os.path.exists(caminho):
+            os.remove(caminho)
+
+# =============================================================================
+# CLIENTE ASSÍNCRONO (ASYNCIO) PARA A API
+# =============================================================================
+class ClienteAPIAsync:
+    """Mantém várias requisições ao relatório analítico em voo ao mesmo tempo"""
+    def __init__(self, logger, token=None, cookies=None, api_url=API_URL,
+                 limite_concorrencia=ASYNC_CONCORRENCIA, page_size=DEFAULT_PAGE_SIZE, max_pages=MAX_PAGES,
+                 limitador=None, ajustador=None, tentativas=TRANSPORTE_TENTATIVAS,
+                 backoff_base=TRANSPORTE_BACKOFF_BASE, backoff_max=TRANSPORTE_BACKOFF_MAX, orcamento=None):
+        self.logger = logger
+        self.token = token
+        self.cookies = cookies or []
+        self.api_url = api_url
+        self.limite_concorrencia = max(limite_concorrencia, 1)
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.limitador = limitador or limitador_compartilhado()
+        self.orcamento = orcamento or orcamento_concorrencia()
+        self.ajustador = ajustador  # Recebe latência/bytes de cada página (size fixo durante a execução)
+        self.tentativas = max(tentativas, 0)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.espera_limitador = 0.0
+        self.tempo_rede = 0.0
+        self.retries = 0
+    
+    def _headers(self):
+        """Mesmos headers da sessão requests, com token e cookies do Selenium"""
+        headers = {
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+            "Accept": "application/json, text/plain, */*",
+            "Origin": "https://avia.unipix.com.br",
+            "Referer": "https://avia.unipix.com.br/"
+        }
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        if self.cookies:
+            headers["Cookie"] = "; ".join(f"{c.get('name')}={c.get('value')}" for c in self.cookies)
+        return headers
+    
+    def _backoff(self, tentativa):
+        """Backoff exponencial com jitter completo (mesma regra do TransporteAPI)"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** tentativa)))
+    
+    async def _reservar_orcamento(self):
+        """Vaga no orçamento de concorrência do processo (semáforo de threads) sem bloquear o event loop"""
+        while not self.orcamento.acquire(blocking=False):
+            await asyncio.sleep(ASYNC_ORCAMENTO_POLL)
+    
+    async def _buscar_pagina(self, session, semaforo, consulta, page):
+        """Busca uma página respeitando o limite global de concorrência, repetindo 429/5xx/timeouts"""
+        params = build_params(consulta["inicio_iso"], consulta["fim_iso"], page=page,
+                              size=self.page_size, **consulta.get("filtros", {}))
+        for tentativa in range(self.tentativas + 1):
+            espera = None
+            try:
+                async with semaforo:
+                    self.espera_limitador += await self.limitador.adquirir_async()
+                    # O mesmo teto de requisições em voo das sessões síncronas e das outras contas
+                    await self._reservar_orcamento()
+                    try:
+                        inicio = time.perf_counter()
+                        async with session.get(self.api_url, params=params, headers=self._headers()) as resp:
+                            if resp.status == 429:
+                                self.limitador.reduzir()
+                            if resp.status in TransporteAPI.STATUS_TRANSITORIOS and tentativa < self.tentativas:
+                                espera = TransporteAPI._retry_after(resp)
+                                if espera is None:
+                                    espera = self._backoff(tentativa)
+                                self.logger.warning(f"⚠️  HTTP {resp.status} (página {page + 1}) - nova tentativa em "
+                                                    f"{espera:.1f}s ({tentativa + 1}/{self.tentativas})")
+                            elif resp.status == 401:
+                                self.logger.error("❌ 401 Não autorizado na API. Token/cookies inválidos.")
+                                return None
+                            elif resp.status >= 400:
+                                texto = await resp.text()
+                                self.logger.error(f"❌ Falha na API ({resp.status}): {texto[:300]}")
+                                return None
+                            else:
+                                corpo = await resp.read()
+                                bytes_rede = int(resp.headers.get("Content-Length") or len(corpo))
+                                data = decodificar_json(corpo)
+                    finally:
+                        self.orcamento.release()
+                    if espera is None:
+                        latencia = time.perf_counter() - inicio
+                        self.tempo_rede += latencia
+                        self.limitador.recuperar()
+                        break
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if tentativa >= self.tentativas:
+                    self.logger.error(f"❌ Erro de requisição assíncrona (página {page + 1}): {e}")
+                    return None
+                espera = self._backoff(tentativa)
+                self.logger.warning(f"⚠️  {type(e).__name__} (página {page + 1}) - nova tentativa em {espera:.1f}s "
+                                    f"({tentativa + 1}/{self.tentativas})")
+            
+            # Espera fora do semáforo: a vaga fica livre para as outras páginas
+            self.retries += 1
+            await asyncio.sleep(espera)
+        
+        if isinstance(data, dict) and "content" in data:
+            rows = data["content"] or []
+        else:
+            rows = data.get("items") or data.get("rows") or []
+        if self.ajustador:
+            self.ajustador.registrar(self.page_size, len(rows), latencia, bytes_rede)
+        
+        return {
+            "page": page,
+            "rows": rows,
+            "last": data.get("last"),
+            "total_pages": data.get("totalPages"),
+            "total_elements": data.get("totalElements"),
+            "latencia": latencia,
+            "bytes": bytes_rede
+        }
+    
+    def _eh_ultima(self, pagina):
+        """Verifica se a página é a última da consulta"""
+        if pagina["last"] is True:
+            return True
+        if pagina["total_pages"] is not None and pagina["page"] + 1 >= int(pagina["total_pages"]):
+            return True
+        return len(pagina["rows"]) < self.page_size
+    
+    async def extrair_consulta(self, session, semaforo, consulta):
+        """Extrai todas as páginas de uma consulta (período + filtros) - retorna (registros, completo)"""
+        periodo = consulta.get("periodo", "")
+        primeira = await self._buscar_pagina(session, semaforo, consulta, 0)
+        if primeira is None:
+            return [], False
+        
+        rows = list(primeira["rows"])
+        if self._eh_ultima(primeira):
+            return rows, True
+        
+        if primeira["total_pages"] is None:
+            # Sem totalPages: segue página a página até a última
+            page = 1
+            while page < self.max_pages:
+                pagina = await self._buscar_pagina(session, semaforo, consulta, page)
+                if pagina is None:
+                    self.logger.error(f"❌ Consulta {periodo} truncada por falha de página")
+                    return rows, False
+                rows.extend(pagina["rows"])
+                if self._eh_ultima(pagina):
+                    return rows, True
+                page += 1
+            self.logger.warning(f"⚠️  Consulta {periodo}: limite de {self.max_pages} páginas atingido - truncada")
+            return rows, False
+        
+        total_pages = int(primeira["total_pages"])
+        completo = True
+        if total_pages > self.max_pages:
+            self.logger.warning(f"⚠️  Consulta {periodo}: {total_pages} páginas excedem o limite de "
+                                f"{self.max_pages} - truncada")
+            total_pages = self.max_pages
+            completo = False
+        paginas = await asyncio.gather(*(
+            self._buscar_pagina(session, semaforo, consulta, page) for page in range(1, total_pages)
+        ))
+        
+        for pagina in paginas:
+            if pagina is None:
+                self.logger.error(f"❌ Consulta {periodo} truncada por falha de página")
+                return rows, False
+            rows.extend(pagina["rows"])
+        
+        return rows, completo
+    
+    async def extrair_consultas(self, consultas):
+        """Extrai várias consultas em paralelo sob um único limite de concorrência - (registros, completo) por consulta"""
+        semaforo = asyncio.Semaphore(self.limite_concorrencia)
+        conector = aiohttp.TCPConnector(ssl=False, limit=self.limite_concorrencia)
+        timeout = aiohttp.ClientTimeout(total=180)
+        
+        async with aiohttp.ClientSession(connector=conector, timeout=timeout) as session:
+            return await asyncio.gather(
+                *(self.extrair_consulta(session, semaforo, consulta) for consulta in consultas),
+                return_exceptions=True
+            )
+
 # =============================================================================
 # UNIPIX SCRAPER COM API - VERSÃO ALTERNATIVA (SSL FIXED)
 # =============================================================================
+# Navigation/Resource Timing da página atual: DOM pronto (ms), recursos baixados e bytes transferidos
+JS_METRICAS_PAGINA = """
+var nav = performance.getEntriesByType('navigation')[0], recursos = performance.getEntriesByType('resource'), bytes = 0;
+for (var i = 0; i < recursos.length; i++) { bytes += recursos[i].transferSize || 0; }
+return {dom: nav ? nav.domContentLoadedEventEnd : 0, recursos: recursos.length, bytes: bytes};
+"""
+
+# Sondagem de seletores no próprio navegador: uma chamada execute_async_script avalia a lista
+# inteira de XPaths a cada 100 ms até o prazo e devolve [elemento, índice do XPath] ou null
+JS_SONDAR_SELETORES = """
+var seletores = arguments[0], prazo = Date.now() + arguments[1] * 1000, clicavel = arguments[2];
+var pronto = arguments[arguments.length - 1];
+function visivel(el) {
+    var caixa = el.getBoundingClientRect(), estilo = window.getComputedStyle(el);
+    return caixa.width > 0 && caixa.height > 0 && estilo.visibility !== 'hidden' && estilo.display !== 'none';
+}
+function sondar() {
+    for (var i = 0; i < seletores.length; i++) {
+        var achados;
+        try {
+            achados = document.evaluate(seletores[i], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        } catch (e) {
+            continue;
+        }
+        for (var j = 0; j < achados.snapshotLength; j++) {
+            var el = achados.snapshotItem(j);
+            if (el.nodeType === 1 && visivel(el) && (!clicavel || !el.disabled)) {
+                pronto([el, i]);
+                return;
+            }
+        }
+    }
+    if (Date.now() >= prazo) {
+        pronto(null);
+        return;
+    }
+    setTimeout(sondar, 100);
+}
+sondar();
+"""
+
 class UnipixScraperAPI:
-    def __init__(self, config, download_folder):
+    def __init__(self, config, download_folder, planilha_2fa=None):
         self.config = config
         self.download_folder = download_folder
         self.driver = None
         self.wait = None
         self.logger = config.logger
-        self.planilha_reader = PlanilhaCodeReader(config)
+        self.planilha_reader = PlanilhaCodeReader(config, planilha_2fa)
         self.token = None
         self.cookies = None
+        self.api_url = API_URL
+        self._credenciais = None
+        self._geracao_sessao = 0
+        self._reautenticacoes = 0
+        self._lock_autenticacao = threading.RLock()
+        self.tempos_login = {}
+        self._instante_submit = None
+        self._tela_login = None  # (URL, campo de senha) no momento do submit
+        self._timeout_script = 0  # Script timeout já configurado no driver
+        self.cache_respostas = None
+        if USAR_CACHE_RESPOSTAS:
+            self.cache_respostas = cache_respostas_compartilhado(os.path.join(config.state_folder, "cache_api"),
+                                                                 logger=self.logger)
     
-    def configurar_chrome(self, headless=False):
-        """Configura o Chrome para autenticação"""
+    def configurar_chrome(self, headless=None, enxuto=NAVEGADOR_ENXUTO):
+        """Configura o Chrome para autenticação (enxuto: só o necessário para o login e o token)"""
+        carregar_selenium()
         chrome_options = Options()
+        if headless is None:
+            headless = enxuto if NAVEGADOR_HEADLESS is None else NAVEGADOR_HEADLESS
         
         if headless:
-            chrome_options.add_argument("--headless")
+            chrome_options.add_argument("--headless=new")
         chrome_options.add_argument("--no-sandbox")
         chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--window-size=1920,1080")
+        
+        if enxuto:
+            # Não espera imagens/iframes para liberar o driver; sem GPU, extensões e tráfego de fundo
+            chrome_options.page_load_strategy = "eager"
+            chrome_options.add_argument("--window-size=1280,800")
+            for flag in ["--disable-gpu", "--disable-extensions", "--disable-background-networking",
+                         "--disable-default-apps", "--disable-sync", "--no-first-run", "--mute-audio",
+                         "--blink-settings=imagesEnabled=false"]:
+                chrome_options.add_argument(flag)
+            chrome_options.add_experimental_option("prefs", {
+                "profile.managed_default_content_settings.images": 2,
+                "profile.default_content_setting_values.notifications": 2
+            })
+        else:
+            chrome_options.add_argument("--window-size=1920,1080")
         
         self.driver = webdriver.Chrome(options=chrome_options)
+        if enxuto:
+            # Fontes, mídia e rastreadores barrados na camada de rede
+            try:
+                self.driver.execute_cdp_cmd("Network.enable", {})
+                self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": NAVEGADOR_BLOQUEAR})
+            except Exception as e:
+                self.logger.warning(f"⚠️  Bloqueio de recursos indisponível: {e}")
         self.wait = WebDriverWait(self.driver, 30)
-        self.logger.info("✅ Navegador Chrome configurado")
+        self._timeout_script = 0
+        modo = ", ".join(rotulo for rotulo, ligado in [("enxuto", enxuto), ("headless", headless)] if ligado)
+        self.logger.info("✅ Navegador Chrome configurado" + (f" ({modo})" if modo else ""))
     
     def coletar_credenciais_usuario(self):
         """Coleta credenciais e período do usuário"""
@@ -305,7 +1717,148 @@ class UnipixScraperAPI:
         
         credenciais['periodo'] = periodo
         
-        return credenciais
+        return credenciais
+    
+    def autenticar(self, usuario, senha, usar_cache=USAR_CACHE_SESSAO, token_rejeitado=None):
+        """Reaproveita a sessão em cache (sem navegador) ou faz o login completo"""
+        self._credenciais = (usuario, senha)
+        cache = SessaoCache(self.config.state_folder, self.logger) if usar_cache else None
+        
+        if cache and cache.ativo:
+            sessao = cache.carregar(usuario)
+            if sessao and token_rejeitado and sessao.get("token") == token_rejeitado:
+                # A API recusou justamente o token do cache
+                cache.invalidar(usuario)
+                sessao = None
+            if sessao:
+                self.token = sessao.get("token")
+                self.cookies = sessao.get("cookies")
+                self._geracao_sessao += 1
+                print("♻️  Sessão reaproveitada do cache - login no navegador dispensado")
+                return True
+        
+        if not self._fazer_login(usuario, senha):
+            return False
+        self._geracao_sessao += 1
+        
+        if cache and cache.ativo:
+            cache.salvar(usuario, self.token, self.cookies)
+        return True
+    
+    def _aguardar_condicao(self, condicao, timeout, etapa):
+        """Espera explícita (WebDriverWait) com timeout; registra a duração da etapa - None se estourar"""
+        inicio = time.perf_counter()
+        try:
+            resultado = WebDriverWait(self.driver, timeout, poll_frequency=0.25).until(condicao)
+        except TimeoutException:
+            self.logger.warning(f"⚠️  Timeout de {timeout}s aguardando: {etapa}")
+            resultado = None
+        self._registrar_etapa_login(etapa, time.perf_counter() - inicio)
+        return resultado
+    
+    def _registrar_carga_pagina(self, etapa):
+        """Loga o DOM pronto, os recursos baixados e os bytes transferidos até agora na página"""
+        try:
+            dados = self.driver.execute_script(JS_METRICAS_PAGINA)
+        except Exception:
+            return
+        if dados:
+            self.logger.info(f"⏱️  {etapa}: DOM pronto em {dados['dom']:.0f} ms, "
+                             f"{dados['recursos']} recursos ({dados['bytes'] / 1024:.0f} KB)")
+    
+    def _registrar_etapa_login(self, etapa, duracao):
+        self.tempos_login[etapa] = self.tempos_login.get(etapa, 0.0) + duracao
+        self.logger.info(f"⏱️  {etapa}: {duracao:.1f}s")
+    
+    def _resumo_tempos_login(self):
+        """Loga o tempo de cada etapa do login e o total"""
+        if self.tempos_login:
+            etapas = " | ".join(f"{etapa} {duracao:.1f}s" for etapa, duracao in self.tempos_login.items())
+            self.logger.info(f"⏱️  Login: {etapas} | total {sum(self.tempos_login.values()):.1f}s")
+    
+    def _sondar_seletores(self, seletores, timeout, clicavel=True):
+        """Procura os XPaths em uma única chamada ao navegador, reavaliando a lista até o prazo
+        
+        Devolve (elemento, índice do XPath) do primeiro visível - e habilitado, se clicavel -
+        ou (None, None). timeout=0 faz uma única checagem.
+        """
+        if self._timeout_script < timeout + 5:
+            self._timeout_script = timeout + 5
+            self.driver.set_script_timeout(self._timeout_script)
+        prazo = time.monotonic() + timeout
+        while True:
+            restante = max(prazo - time.monotonic(), 0)
+            try:
+                resultado = self.driver.execute_async_script(JS_SONDAR_SELETORES, list(seletores), restante, clicavel)
+            except WebDriverException as e:
+                # Navegação no meio da sondagem ("document unloaded" etc.) interrompe o script:
+                # sonda de novo na página nova enquanto houver prazo
+                if time.monotonic() >= prazo:
+                    self.logger.warning(f"⚠️  Sondagem de seletores falhou: {e}")
+                    return None, None
+                time.sleep(0.1)
+                continue
+            return (resultado[0], int(resultado[1])) if resultado else (None, None)
+    
+    def _aguardar_seletores(self, seletores, timeout, etapa):
+        """Espera o primeiro XPath visível da lista (sondagem no navegador); registra a duração da etapa"""
+        inicio = time.perf_counter()
+        elemento, _ = self._sondar_seletores(seletores, timeout, clicavel=False)
+        if elemento is None:
+            self.logger.warning(f"⚠️  Timeout de {timeout}s aguardando: {etapa}")
+        self._registrar_etapa_login(etapa, time.perf_counter() - inicio)
+        return elemento
+    
+    def _fora_da_tela_login(self):
+        url = self.driver.current_url.lower()
+        return "login" not in url and "auth" not in url
+    
+    def _saiu_do_formulario_login(self):
+        """True quando a URL mudou desde o submit ou o campo de senha sumiu da página"""
+        if self._tela_login is None:
+            return True
+        url, campo_senha = self._tela_login
+        if self.driver.current_url != url:
+            return True
+        try:
+            return not campo_senha.is_displayed()
+        except StaleElementReferenceException:
+            # O formulário foi removido do DOM
+            return True
+    
+    def _estado_pos_login(self, driver):
+        """Condição após o submit: "2fa" se a página pediu código, "logado" se saiu da tela de login"""
+        # Os indicadores de 2FA ("código", "autenticação"...) também casam com a própria tela de login
+        if not self._saiu_do_formulario_login():
+            return False
+        if self._verificar_se_precisa_2fa():
+            return "2fa"
+        if self._fora_da_tela_login():
+            return "logado"
+        return False
+    
+    @staticmethod
+    def _token_disponivel(driver):
+        """Condição: a SPA já gravou algum JWT no localStorage/sessionStorage"""
+        return driver.execute_script(
+            "const valores = Object.values(window.localStorage).concat(Object.values(window.sessionStorage));"
+            "return valores.some(v => /eyJ[\\w-]+\\.[\\w-]+\\.[\\w-]+/.test(v));"
+        )
+    
+    @staticmethod
+    def _rede_ociosa(janela=REDE_OCIOSA_JANELA):
+        """Condição: documento carregado e nenhum recurso novo na rede por `janela` segundos"""
+        estado = {"total": None, "desde": time.monotonic()}
+        def condicao(driver):
+            total = driver.execute_script(
+                "return document.readyState === 'complete' ? performance.getEntriesByType('resource').length : -1;"
+            )
+            agora = time.monotonic()
+            if total != estado["total"]:
+                estado.update(total=total, desde=agora)
+                return False
+            return total >= 0 and agora - estado["desde"] >= janela
+        return condicao
     
     def fazer_login_unipix(self, usuario, senha):
         """Faz login no site da Unipix e extrai token/cookies"""
@@ -313,15 +1866,18 @@ class UnipixScraperAPI:
             self.logger.info("🔐 Fazendo login na Unipix via API...")
             print("🔐 Realizando login...")
             
+            self.tempos_login = {}
+            
             # Configura navegador
-            self.configurar_chrome(headless=False)
+            inicio = time.perf_counter()
+            self.configurar_chrome()
+            self._registrar_etapa_login("abrir navegador", time.perf_counter() - inicio)
             
             # Acessa a página de login
+            inicio = time.perf_counter()
             self.driver.get(LOGIN_URL)
-            time.sleep(5)
-            
-            # Aguarda a página carregar
-            self.wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+            self._registrar_etapa_login("carregar página de login", time.perf_counter() - inicio)
+            self._registrar_carga_pagina("página de login")
             
             # Preenche usuário
             seletores_usuario = [
@@ -332,13 +1888,8 @@ class UnipixScraperAPI:
                 "//input[@type='email']"
             ]
             
-            campo_usuario = None
-            for seletor in seletores_usuario:
-                try:
-                    campo_usuario = self.driver.find_element(By.XPATH, seletor)
-                    break
-                except:
-                    continue
+            # Aguarda o campo de usuário ser renderizado (em vez de espera fixa)
+            campo_usuario = self._aguardar_seletores(seletores_usuario, LOGIN_TIMEOUT, "tela de login")
             
             if not campo_usuario:
                 self.logger.error("❌ Campo de usuário não encontrado")
@@ -356,13 +1907,7 @@ class UnipixScraperAPI:
                 "//input[@type='password']"
             ]
             
-            campo_senha = None
-            for seletor in seletores_senha:
-                try:
-                    campo_senha = self.driver.find_element(By.XPATH, seletor)
-                    break
-                except:
-                    continue
+            campo_senha, _ = self._sondar_seletores(seletores_senha, 0, clicavel=False)
             
             if not campo_senha:
                 self.logger.error("❌ Campo de senha não encontrado")
@@ -380,33 +1925,28 @@ class UnipixScraperAPI:
                 "//input[@type='submit']"
             ]
             
-            botao_login = None
-            for seletor in seletores_botao:
-                try:
-                    botao_login = self.driver.find_element(By.XPATH, seletor)
-                    break
-                except:
-                    continue
+            botao_login, _ = self._sondar_seletores(seletores_botao, 0)
             
             if not botao_login:
                 self.logger.error("❌ Botão de login não encontrado")
                 return False
             
+            self._tela_login = (self.driver.current_url, campo_senha)
             botao_login.click()
+            self._instante_submit = time.time()
             self.logger.info("✅ Botão de login clicado")
             
-            # Aguarda o processamento do login
-            time.sleep(5)
+            # Aguarda a página pedir o 2FA ou sair da tela de login
+            estado = self._aguardar_condicao(self._estado_pos_login, LOGIN_TIMEOUT, "resposta do login")
             
-            # Verifica se precisa de autenticação de dois fatores
-            if self._verificar_se_precisa_2fa():
-                return self._processar_autenticacao_2fa_automatica()
+            if estado == "2fa":
+                sucesso = self._processar_autenticacao_2fa_automatica()
             else:
                 # Login sem 2FA
-                time.sleep(5)
-                if self._verificar_login_sucesso():
-                    return self._extrair_token_cookies()
-                return False
+                sucesso = self._verificar_login_sucesso() and self._extrair_token_cookies()
+            self._registrar_carga_pagina("até o token")
+            self._resumo_tempos_login()
+            return sucesso
                 
         except Exception as e:
             self.logger.error(f"❌ Erro no login: {e}")
@@ -426,15 +1966,12 @@ class UnipixScraperAPI:
                 "//input[@type='number']"
             ]
             
-            for indicador in indicadores_2fa:
-                try:
-                    elemento = self.driver.find_element(By.XPATH, indicador)
-                    if elemento.is_displayed():
-                        self.logger.info("🔐 Autenticação de dois fatores detectada")
-                        print("🔐 Autenticação de dois fatores necessária")
-                        return True
-                except:
-                    continue
+            # Uma sondagem só para todos os indicadores (roda a cada poll da espera pós-login)
+            elemento, _ = self._sondar_seletores(indicadores_2fa, 0, clicavel=False)
+            if elemento:
+                self.logger.info("🔐 Autenticação de dois fatores detectada")
+                print("🔐 Autenticação de dois fatores necessária")
+                return True
             
             return False
             
@@ -449,8 +1986,6 @@ class UnipixScraperAPI:
             print("="*50)
             print("⏳ Aguardando planilha ser atualizada...")
             
-            time.sleep(60)
-            
             # Obtém código da planilha
             codigo_2fa = self.obter_codigo_verificacao()
             
@@ -467,17 +2002,22 @@ class UnipixScraperAPI:
             self.logger.error(f"❌ Erro na autenticação automática: {e}")
             return self._processar_autenticacao_2fa_manual()
     
-    def obter_codigo_verificacao(self, tempo_espera=60):
-        """Obtém o código de verificação da planilha"""
+    def obter_codigo_verificacao(self, tempo_espera=LOGIN_TIMEOUT_2FA):
+        """Obtém o código de verificação assim que a planilha for regravada após o login"""
         try:
             self.logger.info("📊 Obtendo código da planilha...")
-            print(f"⏳ Aguardando {tempo_espera} segundos para planilha atualizar...")
-            
-            for i in range(tempo_espera // 10, 0, -1):
-                print(f"   🕒 {i * 10} segundos restantes...")
-                time.sleep(10)
+            print(f"⏳ Aguardando a planilha receber o novo código (até {tempo_espera}s)...")
+            
+            # Espera a gravação do código novo (mtime posterior ao envio do login)
+            inicio = time.perf_counter()
+            desde = self._instante_submit or time.time()
+            atualizada = self.planilha_reader.aguardar_atualizacao(desde, tempo_maximo=tempo_espera)
+            self._registrar_etapa_login("código 2FA na planilha", time.perf_counter() - inicio)
+            if not atualizada:
+                # O código que está na planilha é de um login anterior: não adianta enviá-lo
+                return None
             
-            self.logger.info("✅ Finalizou espera, lendo planilha...")
+            self.logger.info("✅ Lendo planilha...")
             
             codigo = self.planilha_reader.ler_codigo_da_planilha()
             
@@ -505,13 +2045,7 @@ class UnipixScraperAPI:
                 "//input[@type='text']"
             ]
             
-            campo_codigo = None
-            for seletor in seletores_codigo:
-                try:
-                    campo_codigo = self.driver.find_element(By.XPATH, seletor)
-                    break
-                except:
-                    continue
+            campo_codigo = self._aguardar_seletores(seletores_codigo, LOGIN_TIMEOUT, "campo do código 2FA")
             
             if not campo_codigo:
                 print("❌ Campo do código de autenticação não encontrado")
@@ -530,24 +2064,20 @@ class UnipixScraperAPI:
                 "//button[contains(text(), 'Enviar')]"
             ]
             
-            botao_verificar = None
-            for seletor in seletores_verificar:
-                try:
-                    botao_verificar = self.driver.find_element(By.XPATH, seletor)
-                    botao_verificar.click()
-                    break
-                except:
-                    continue
+            botao_verificar, _ = self._sondar_seletores(seletores_verificar, 0)
             
             if not botao_verificar:
                 print("❌ Botão de verificação não encontrado")
                 return False
             
+            botao_verificar.click()
+            
             self.logger.info("✅ Botão de verificação clicado")
             print("⏳ Verificando código...")
             
-            # Aguarda a verificação
-            time.sleep(8)
+            # Aguarda sair da tela de autenticação ou o token aparecer no storage
+            self._aguardar_condicao(lambda driver: self._fora_da_tela_login() or self._token_disponivel(driver),
+                                    LOGIN_TIMEOUT, "verificação do código")
             
             if self._verificar_login_sucesso():
                 return self._extrair_token_cookies()
@@ -560,8 +2090,9 @@ class UnipixScraperAPI:
     def _processar_autenticacao_2fa_manual(self):
         """Fallback para autenticação manual"""
         try:
-            print("\n🔢 AUTENTICAÇÃO MANUAL")
-            codigo_2fa = input("🔢 Digite o código de autenticação de dois fatores: ").strip()
+            with _lock_login_interativo:
+                print(f"\n🔢 AUTENTICAÇÃO MANUAL ({self._conta()})")
+                codigo_2fa = input("🔢 Digite o código de autenticação de dois fatores: ").strip()
             
             if not codigo_2fa:
                 print("❌ Código de autenticação é obrigatório!")
@@ -596,6 +2127,9 @@ class UnipixScraperAPI:
         try:
             self.logger.info("🔍 Extraindo token e cookies...")
             
+            # A SPA grava o token depois das chamadas pós-login: espera a rede acalmar
+            self._aguardar_condicao(self._rede_ociosa(), LOGIN_TIMEOUT, "rede ociosa pós-login")
+            
             # Extrai token do localStorage
             entries = self.driver.execute_script("return Object.entries(window.localStorage);")
             token = None
@@ -652,6 +2186,102 @@ class UnipixScraperAPI:
             self.logger.error(f"❌ Erro ao extrair token/cookies: {e}")
             return False
     
+    def _fazer_login(self, usuario, senha):
+        """Login só por HTTP quando configurado; o navegador entra apenas se ele falhar"""
+        if LOGIN_HTTP and AUTH_URL:
+            if self.fazer_login_http(usuario, senha):
+                return True
+            self.logger.warning("⚠️  Login HTTP indisponível - usando o navegador")
+        return self.fazer_login_unipix(usuario, senha)
+    
+    @staticmethod
+    def _token_da_resposta(resp):
+        """Token JWT do corpo JSON (ou do header Authorization) + o corpo como dict (None se não for JSON)"""
+        try:
+            corpo = resp.json()
+        except ValueError:
+            corpo = None
+        corpo = corpo if isinstance(corpo, dict) else None
+        token = extrair_token_json(corpo)
+        if not token:
+            cabecalho = resp.headers.get("Authorization", "").split()
+            token = cabecalho[-1] if cabecalho and is_jwt(cabecalho[-1]) else None
+        return token, corpo
+    
+    def fazer_login_http(self, usuario, senha):
+        """Faz login direto nos endpoints de autenticação (sem navegador) e guarda token/cookies"""
+        self.tempos_login = {}
+        sess = requests.Session()
+        sess.verify = False
+        sess.headers.update({
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+            "Accept": "application/json, text/plain, */*",
+            "Origin": "https://avia.unipix.com.br",
+            "Referer": "https://avia.unipix.com.br/"
+        })
+        
+        try:
+            self.logger.info("🔐 Fazendo login via HTTP (sem navegador)...")
+            print("🔐 Realizando login...")
+            
+            inicio = time.perf_counter()
+            self._instante_submit = time.time()
+            resp = sess.post(AUTH_URL, json={"username": usuario, "password": senha}, timeout=LOGIN_TIMEOUT)
+            self._registrar_etapa_login("login HTTP", time.perf_counter() - inicio)
+            if resp.status_code in (401, 403):
+                self.logger.error(f"❌ Login HTTP recusado (HTTP {resp.status_code})")
+                return False
+            resp.raise_for_status()
+            token, corpo = self._token_da_resposta(resp)
+            if corpo is None:
+                # HTML, página de erro do balanceador etc.: não é o endpoint de autenticação
+                self.logger.error(f"❌ Login HTTP: resposta não é JSON ({resp.headers.get('Content-Type', '?')})")
+                return False
+            
+            if not token:
+                # Sem token, só segue para o 2FA se a resposta pedir o código explicitamente
+                pede_2fa = any(campo in corpo for campo in AUTH_CAMPOS_DESAFIO) or \
+                    any(corpo.get(flag) is True for flag in AUTH_INDICADORES_2FA)
+                if not pede_2fa:
+                    self.logger.error("❌ Login HTTP: resposta sem token e sem pedido de código 2FA")
+                    return False
+                print("🔐 Autenticação de dois fatores necessária")
+                codigo_2fa = self.obter_codigo_verificacao()
+                if not codigo_2fa:
+                    return False
+                
+                desafio = {campo: corpo[campo] for campo in AUTH_CAMPOS_DESAFIO if campo in corpo}
+                inicio = time.perf_counter()
+                resp = sess.post(AUTH_2FA_URL, json={"username": usuario, "code": codigo_2fa, **desafio},
+                                 timeout=LOGIN_TIMEOUT)
+                self._registrar_etapa_login("2FA HTTP", time.perf_counter() - inicio)
+                if resp.status_code in (400, 401, 403):
+                    self.logger.error(f"❌ Código 2FA recusado (HTTP {resp.status_code})")
+                    return False
+                resp.raise_for_status()
+                token, _ = self._token_da_resposta(resp)
+            
+            cookie_sessao = any(cookie.name in AUTH_COOKIES_SESSAO for cookie in sess.cookies)
+            if not token and not cookie_sessao:
+                self.logger.error("❌ Login HTTP não devolveu token JWT nem cookie de sessão")
+                return False
+            
+            self.token = token
+            self.cookies = cookies_requests_para_lista(sess.cookies)
+            if token:
+                self.logger.info("✅ Token JWT obtido sem navegador")
+            else:
+                self.logger.warning("⚠️  Token JWT não encontrado, usando o cookie de sessão")
+            print("✅ Login realizado com sucesso!")
+            self._resumo_tempos_login()
+            return True
+            
+        except requests.RequestException as e:
+            self.logger.warning(f"⚠️  Erro no login HTTP: {e}")
+            return False
+        finally:
+            sess.close()
+    
     def converter_periodo_para_iso(self, periodo):
         """Converte período no formato DD/MM/AAAA - DD/MM/AAAA para ISO UTC"""
         try:
@@ -675,8 +2305,373 @@ class UnipixScraperAPI:
             self.logger.error(f"❌ Erro ao converter período: {e}")
             return None, None
     
-    def baixar_relatorio_via_api(self, periodo):
-        """Baixa relatório analítico via API usando token/cookies - COM SSL FIX"""
+    def _criar_sessao_api(self, pool_size=API_WORKERS):
+        """Prepara sessão de transporte autenticada com token/cookies - COM SSL FIX"""
+        sess = TransporteAPI(pool_size=pool_size, logger=self.logger)
+        
+        sess.headers.update({
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+            "Accept": "application/json, text/plain, */*",
+            "Origin": "https://avia.unipix.com.br",
+            "Referer": "https://avia.unipix.com.br/"
+        })
+        
+        self._aplicar_credenciais(sess)
+        return sess
+    
+    def _aplicar_credenciais(self, sess):
+        """Coloca o token/cookies atuais na sessão (também após reautenticar)"""
+        if self.token:
+            sess.headers["Authorization"] = f"Bearer {self.token}"
+            self.logger.info("🔑 Usando token JWT para autenticação")
+        else:
+            sess.headers.pop("Authorization", None)
+            self.logger.info("🍪 Usando cookies para autenticação")
+        
+        if self.cookies:
+            jar = cookies_selenium_para_requests(self.cookies, 
+                                               target_domain="aws-api-sms-interna.unipix.com.br")
+            sess.cookies = jar
+    
+    def _verificar_expiracao_token(self, sess):
+        """Renova a sessão antes de enviar a requisição se o exp do JWT estiver próximo"""
+        if not self.token or self._reautenticacoes >= REAUTH_MAX:
+            return
+        expira_em = jwt_expiracao(self.token)
+        if expira_em is not None and expira_em - time.time() <= SESSAO_MARGEM_EXPIRACAO:
+            self.logger.warning("⌛ Token JWT prestes a expirar")
+            self._renovar_autenticacao(sess, self._geracao_sessao)
+    
+    def _renovar_autenticacao(self, sess, geracao_rejeitada):
+        """Reautentica uma única vez (cache ou navegador) e atualiza a sessão compartilhada"""
+        with self._lock_autenticacao:
+            if self._geracao_sessao != geracao_rejeitada:
+                # Outro worker já renovou enquanto esta requisição estava em voo
+                self._aplicar_credenciais(sess)
+                return True
+            
+            if self._reautenticacoes >= REAUTH_MAX or not self._credenciais:
+                self.logger.error("❌ Sessão expirada e reautenticação indisponível")
+                return False
+            
+            self._reautenticacoes += 1
+            self.logger.warning("🔐 Sessão expirada - reautenticando...")
+            print("🔐 Sessão expirada - reautenticando...")
+            
+            usuario, senha = self._credenciais
+            # Serializado no processo: contas do pool não abrem navegadores nem pedem 2FA ao mesmo tempo
+            with _lock_login_interativo:
+                try:
+                    if self.driver:
+                        self.driver.quit()
+                        self.driver = None
+                    if not self.autenticar(usuario, senha, token_rejeitado=self.token):
+                        return False
+                finally:
+                    # Token e cookies já extraídos: o navegador aberto na renovação não fica para trás
+                    if self.driver:
+                        self.driver.quit()
+                        self.driver = None
+            
+            self._aplicar_credenciais(sess)
+            return True
+    
+    def _buscar_pagina(self, sess, inicio_iso, fim_iso, page, size=DEFAULT_PAGE_SIZE, filtros=None):
+        """Busca uma página da API e retorna registros + metadados (None em caso de erro)"""
+        params = build_params(inicio_iso, fim_iso, page=page, size=size, **(filtros or {}))
+        
+        self.logger.info(f"📄 Buscando página {page + 1}...")
+        
+        chave_cache = None
+        if self.cache_respostas is not None:
+            chave_cache = self.cache_respostas.chave(params, self._conta())
+            em_cache = self.cache_respostas.obter(chave_cache)
+            if em_cache is not None:
+                # Acerto: nenhuma chamada de rede
+                conteudo, ctype = em_cache
+                self.logger.info(f"🗄️  Página {page + 1} servida do cache")
+                return self._montar_pagina(page, size, conteudo, ctype, latencia=0.0, bytes_rede=0)
+        
+        try:
+            for tentativa in range(2):
+                self._verificar_expiracao_token(sess)
+                geracao = self._geracao_sessao
+                
+                inicio = time.perf_counter()
+                # 🔧 SOLUÇÃO SSL: verify=False na requisição também
+                resp = sess.get(self.api_url, params=params, timeout=180, verify=False)
+                latencia = time.perf_counter() - inicio
+                
+                if resp.status_code == 401 and tentativa == 0 and self._renovar_autenticacao(sess, geracao):
+                    # Retoma exatamente a página que falhou
+                    self.logger.info(f"🔁 Retomando a partir da página {page + 1}")
+                    continue
+                break
+            
+            if resp.status_code == 401:
+                self.logger.error("❌ 401 Não autorizado na API. Token/cookies inválidos.")
+                return None
+            if resp.status_code >= 400:
+                self.logger.error(f"❌ Falha na API ({resp.status_code}): {resp.text[:300]}")
+                return None
+            
+            ctype = resp.headers.get("Content-Type", "")
+            pagina = self._montar_pagina(page, size, resp.content, ctype, latencia=latencia,
+                                         bytes_rede=len(resp.content))
+            if chave_cache is not None:
+                # Só entra no cache a resposta que foi interpretada sem erro
+                self.cache_respostas.guardar(chave_cache, resp.content, ctype, CacheRespostas.ttl_para(fim_iso))
+            return pagina
+            
+        except requests.exceptions.SSLError as ssl_error:
+            self.logger.error(f"❌ Erro SSL (mesmo com verify=False): {ssl_error}")
+            return None
+        except requests.exceptions.RequestException as req_error:
+            self.logger.error(f"❌ Erro de requisição: {req_error}")
+            return None
+    
+    def _montar_pagina(self, page, size, conteudo, ctype, latencia, bytes_rede):
+        """Interpreta o corpo da resposta (rede ou cache) em registros + metadados"""
+        pagina = {
+            "page": page,
+            "rows": [],
+            "last": None,
+            "total_pages": None,
+            "total_elements": None,
+            "formato": "json",
+            "size": size,
+            "bytes": bytes_rede,
+            "latencia": latencia
+        }
+        
+        # Processa resposta
+        if "application/json" in ctype:
+            data = decodificar_json(conteudo)
+            
+            if isinstance(data, dict) and "content" in data:
+                pagina["rows"] = data["content"] or []
+                pagina["last"] = data.get("last")
+                pagina["total_pages"] = data.get("totalPages")
+                pagina["total_elements"] = data.get("totalElements")
+                self.logger.info(f"📊 Página {page + 1}: {len(pagina['rows'])} registros")
+            else:
+                # Outros formatos de resposta
+                pagina["rows"] = data.get("items") or data.get("rows") or []
+                pagina["formato"] = "alternativo"
+                self.logger.info(f"📊 Formato alternativo: {len(pagina['rows'])} registros")
+        else:
+            # Se não for JSON, trata como CSV
+            self.logger.info("📄 Resposta em formato CSV detectada")
+            df = pd.read_csv(pd.compat.StringIO(conteudo.decode("utf-8", errors="replace")))
+            pagina["rows"] = df.to_dict('records')
+            pagina["formato"] = "csv"
+        
+        return pagina
+    
+    def _buscar_pagina_checkpoint(self, sess, inicio_iso, fim_iso, page, size=DEFAULT_PAGE_SIZE, filtros=None, spool=None):
+        """Igual a _buscar_pagina, mas serve do spool as páginas já baixadas e guarda as novas"""
+        if spool is None:
+            return self._buscar_pagina(sess, inicio_iso, fim_iso, page, size=size, filtros=filtros)
+        
+        chave = spool.chave(inicio_iso, fim_iso, page, size)
+        pagina = spool.obter(chave)
+        if pagina is not None:
+            self.logger.info(f"♻️  Página {page + 1} recuperada do spool ({len(pagina['rows'])} registros)")
+            return pagina
+        
+        pagina = self._buscar_pagina(sess, inicio_iso, fim_iso, page, size=size, filtros=filtros)
+        if pagina is not None:
+            spool.guardar(chave, pagina)
+        return pagina
+    
+    def _conta(self):
+        """Conta autenticada nesta instância (separa cache, spool e marcas d'água entre contas)"""
+        return self._credenciais[0] if self._credenciais else UNIPIX_USUARIO
+    
+    def _criar_spool(self, parametros):
+        """Spool do download identificado pelos parâmetros da consulta (None se desativado)"""
+        if not USAR_SPOOL:
+            return None
+        pasta = os.path.join(self.config.state_folder, "spool")
+        SpoolPaginas.limpar_expirados(pasta, logger=self.logger)
+        # Período ainda em aberto (ex.: mês corrente): as páginas mudam a cada execução, não há o que retomar
+        if iso_para_datetime(parametros["fim"]) >= datetime.now():
+            return None
+        return SpoolPaginas(pasta, dict(parametros, conta=self._conta()), self.logger)
+    
+    def _encerrar_spool(self, spool, completo):
+        """Descarta o spool quando o relatório saiu completo; senão mantém para a próxima execução"""
+        if spool is None:
+            return
+        if completo:
+            spool.descartar()
+        else:
+            self.logger.info(f"💾 Páginas baixadas mantidas em {spool.pasta} - rode de novo com o mesmo período "
+                             f"em até {SPOOL_VALIDADE.total_seconds() / 3600:.0f}h para retomar")
+    
+    def _eh_ultima_pagina(self, pagina):
+        """Verifica pelos metadados se a página recebida é a última do relatório"""
+        size = pagina["size"]
+        if pagina["formato"] == "csv":
+            return True
+        if pagina["formato"] == "alternativo":
+            return len(pagina["rows"]) < size
+        
+        if pagina["total_elements"]:
+            self.logger.info(f"📈 Total de registros: {pagina['total_elements']}")
+        
+        if pagina["last"] is True:
+            self.logger.info("✅ Última página alcançada")
+            return True
+        if pagina["total_pages"] is not None and pagina["page"] + 1 >= int(pagina["total_pages"]):
+            self.logger.info("✅ Todas as páginas processadas")
+            return True
+        if len(pagina["rows"]) < size:
+            self.logger.info("✅ Fim dos dados (página incompleta)")
+            return True
+        return False
+    
+    def _baixar_paginas_sequencial(self, sess, inicio_iso, fim_iso, escritor, pagina_inicial=0, filtros=None,
+                                   size=None, ajustador=None, spool=None, max_pages=MAX_PAGES, size_fixo=False,
+                                   primeira=None):
+        """Percorre as páginas uma a uma gravando cada uma - retorna (soma das latências, completo)
+        
+        max_pages=None percorre até a última página, sem limite. size_fixo=True só alimenta o
+        ajustador, sem trocar o size no meio da consulta. primeira: página 0 já buscada.
+        """
+        soma_latencias = 0.0
+        size = size or (ajustador.tamanho if ajustador else DEFAULT_PAGE_SIZE)
+        offset = pagina_inicial * size
+        paginas_lidas = pagina_inicial
+        
+        while max_pages is None or paginas_lidas < max_pages:
+            # Com tamanho adaptativo o índice da página sai do offset já lido
+            if primeira is not None and offset == 0:
+                pagina = primeira
+            else:
+                pagina = self._buscar_pagina_checkpoint(sess, inicio_iso, fim_iso, offset // size, size=size,
+                                                        filtros=filtros, spool=spool)
+            if pagina is None:
+                return soma_latencias, False
+            
+            escritor.escrever(pagina["rows"])
+            soma_latencias += pagina["latencia"]
+            paginas_lidas += 1
+            if ajustador:
+                ajustador.registrar(size, len(pagina["rows"]), pagina["latencia"], pagina["bytes"])
+            
+            if self._eh_ultima_pagina(pagina):
+                return soma_latencias, True
+            
+            offset += len(pagina["rows"])
+            if ajustador and spool is None and not size_fixo:
+                # Com spool o size fica fixo para as páginas baterem com as do checkpoint
+                size = ajustador.proximo_tamanho(offset, size)
+        
+        self.logger.warning(f"⚠️  Limite de {max_pages} páginas atingido - relatório truncado")
+        return soma_latencias, False
+    
+    def _baixar_paginas_concorrente(self, sess, inicio_iso, fim_iso, escritor, workers, filtros=None,
+                                    size=None, ajustador=None, spool=None, max_pages=MAX_PAGES, primeira=None):
+        """Busca a página 0 (se não veio em primeira), lê totalPages e distribui o restante entre os workers"""
+        # Todas as páginas de uma execução concorrente usam o mesmo size (o ajustado nas execuções anteriores)
+        size = size or (ajustador.tamanho if ajustador else DEFAULT_PAGE_SIZE)
+        if primeira is None:
+            primeira = self._buscar_pagina_checkpoint(sess, inicio_iso, fim_iso, 0, size=size, filtros=filtros,
+                                                      spool=spool)
+        if primeira is None:
+            return 0.0, False
+        
+        escritor.escrever(primeira["rows"])
+        soma_latencias = primeira["latencia"]
+        if ajustador:
+            ajustador.registrar(size, len(primeira["rows"]), primeira["latencia"], primeira["bytes"])
+        if self._eh_ultima_pagina(primeira):
+            return soma_latencias, True
+        
+        if primeira["total_pages"] is None:
+            # Sem totalPages não há como distribuir: segue sequencial a partir da página 1
+            self.logger.warning("⚠️  API não informou totalPages, seguindo no modo sequencial")
+            soma_restante, completo = self._baixar_paginas_sequencial(
+                sess, inicio_iso, fim_iso, escritor, pagina_inicial=1, filtros=filtros, size=size,
+                ajustador=ajustador, spool=spool, max_pages=max_pages)
+            return soma_latencias + soma_restante, completo
+        
+        total_pages = int(primeira["total_pages"])
+        completo = True
+        if max_pages is not None and total_pages > max_pages:
+            self.logger.warning(f"⚠️  {total_pages} páginas excedem o limite de {max_pages} - "
+                                "use baixar_relatorio_sharded para o período completo")
+            total_pages = max_pages
+            completo = False
+        self.logger.info(f"⚡ Buscando páginas 2 a {total_pages} com {workers} workers...")
+        
+        tarefas = [(inicio_iso, fim_iso, page, size) for page in range(1, total_pages)]
+        soma_restante, completo_restante = self._buscar_em_ordem(
+            sess, tarefas, escritor, workers, filtros=filtros, ajustador=ajustador, spool=spool)
+        return soma_latencias + soma_restante, completo and completo_restante
+    
+    def _buscar_em_ordem(self, sess, tarefas, escritor, workers, filtros=None, ajustador=None, spool=None):
+        """Executa (inicio_iso, fim_iso, page, size) em paralelo e grava na ordem das tarefas"""
+        soma_latencias = 0.0
+        
+        # Janela deslizante: no máximo 2x workers páginas em memória, gravadas na ordem
+        pendentes = {}
+        proxima = 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for indice, (inicio_iso, fim_iso, page, size) in enumerate(tarefas):
+                while proxima < len(tarefas) and len(pendentes) < workers * 2:
+                    pendentes[proxima] = executor.submit(self._buscar_pagina_checkpoint, sess, *tarefas[proxima],
+                                                         filtros=filtros, spool=spool)
+                    proxima += 1
+                
+                pagina = pendentes.pop(indice).result()
+                if pagina is None:
+                    # Para na primeira falha (igual ao modo sequencial)
+                    self.logger.error(f"❌ Página {page + 1} ({inicio_iso}) falhou - relatório truncado")
+                    for futuro in pendentes.values():
+                        futuro.cancel()
+                    return soma_latencias, False
+                
+                escritor.escrever(pagina["rows"])
+                soma_latencias += pagina["latencia"]
+                if ajustador:
+                    ajustador.registrar(size, len(pagina["rows"]), pagina["latencia"], pagina["bytes"])
+        
+        return soma_latencias, True
+    
+    def _criar_ajustador(self):
+        """Ajustador de tamanho de página persistido por endpoint (None se desativado)"""
+        if not PAGINA_ADAPTATIVA:
+            return None
+        return AjustadorTamanhoPagina(os.path.join(self.config.state_folder, "tamanho_pagina.json"),
+                                      self.api_url, logger=self.logger)
+    
+    def _finalizar_ajustador(self, ajustador):
+        """Escolhe o tamanho para a próxima execução e grava"""
+        if ajustador:
+            ajustador.proximo_tamanho()
+            ajustador.salvar()
+    
+    def _registrar_tempos(self, tempo_total, soma_latencias, workers, sess=None):
+        """Loga o tempo de parede contra o tempo estimado do modo sequencial"""
+        # Soma das latências = tempo de rede que o modo sequencial levaria
+        if tempo_total > 0:
+            self.logger.info(
+                f"⏱️  Download em {tempo_total:.1f}s (sequencial estimado: {soma_latencias:.1f}s, "
+                f"speedup {soma_latencias / tempo_total:.1f}x com {max(workers or 1, 1)} worker(s))"
+            )
+        if sess is not None:
+            sess.registrar_metricas()
+        if self.cache_respostas is not None:
+            self.cache_respostas.registrar_metricas()
+    
+    def baixar_relatorio_via_api(self, periodo, workers=API_WORKERS, formato=FORMATO_SAIDA,
+                                 shard_automatico=SHARD_AUTOMATICO):
+        """Baixa relatório analítico via API usando token/cookies - COM SSL FIX
+        
+        Com shard_automatico, um período que passa de MAX_PAGES páginas segue por baixar_relatorio_sharded.
+        """
         try:
             self.logger.info("📊 Iniciando download via API...")
             print("📊 Baixando relatório via API...")
@@ -686,124 +2681,393 @@ class UnipixScraperAPI:
             if not inicio_iso or not fim_iso:
                 return None
             
-            # Prepara sessão requests COM SSL VERIFY FALSE
-            sess = requests.Session()
+            sess = self._criar_sessao_api(pool_size=workers)
+            
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            nome_arquivo = f"unipix_relatorio_{timestamp}.{formato}"
+            caminho_arquivo = os.path.join(self.download_folder, nome_arquivo)
+            
+            # Faz chamadas paginadas para a API, gravando cada página ao chegar (e no spool)
+            ajustador = self._criar_ajustador()
+            size = ajustador.tamanho if ajustador else DEFAULT_PAGE_SIZE
+            spool = self._criar_spool({"modo": "paginas", "inicio": inicio_iso, "fim": fim_iso})
+            if spool:
+                size = spool.fixar_tamanho(size)
+            
+            inicio = time.perf_counter()
+            primeira = self._buscar_pagina_checkpoint(sess, inicio_iso, fim_iso, 0, size=size, spool=spool)
+            if shard_automatico and primeira and primeira["total_pages"] and int(primeira["total_pages"]) > MAX_PAGES:
+                # Só aqui vale pagar uma contagem por janela: o período não cabe no limite de páginas
+                self.logger.info(f"🧩 {primeira['total_pages']} páginas passam do limite de {MAX_PAGES} - "
+                                 "dividindo o período em shards de data")
+                if spool:
+                    spool.descartar()
+                return self.baixar_relatorio_sharded(periodo, workers=workers, formato=formato)
+            
+            with EscritorRelatorio(caminho_arquivo, formato=formato, logger=self.logger) as escritor:
+                if workers and workers > 1:
+                    soma_latencias, completo = self._baixar_paginas_concorrente(
+                        sess, inicio_iso, fim_iso, escritor, workers, size=size, ajustador=ajustador, spool=spool,
+                        primeira=primeira)
+                else:
+                    soma_latencias, completo = self._baixar_paginas_sequencial(
+                        sess, inicio_iso, fim_iso, escritor, size=size, ajustador=ajustador, spool=spool,
+                        primeira=primeira)
+            self._registrar_tempos(time.perf_counter() - inicio, soma_latencias, workers, sess)
+            self._finalizar_ajustador(ajustador)
+            self._encerrar_spool(spool, completo)
+            
+            if not completo and escritor.total_registros:
+                self.logger.warning("⚠️  Relatório INCOMPLETO - o arquivo contém só as páginas obtidas antes da falha")
+                print("⚠️  Atenção: relatório incompleto (veja o log)")
+            
+            if escritor.total_registros:
+                self.logger.info(f"✅ Dados obtidos: {escritor.total_registros} registros no total")
+                self.logger.info(f"💾 Arquivo salvo: {caminho_arquivo}")
+                return caminho_arquivo
+            else:
+                self.logger.warning("⚠️  Nenhum dado retornado pela API")
+                return None
+                
+        except Exception as e:
+            self.logger.error(f"❌ Erro ao baixar relatório via API: {e}")
+            return None
+    
+    def _contar_registros(self, sess, inicio_iso, fim_iso):
+        """Consulta só o totalElements de uma janela (página de 1 registro)"""
+        pagina = self._buscar_pagina(sess, inicio_iso, fim_iso, 0, size=1)
+        if pagina is None or pagina["total_elements"] is None:
+            return None
+        return int(pagina["total_elements"])
+    
+    def _planejar_shards(self, sess, janelas, workers, size=DEFAULT_PAGE_SIZE):
+        """Conta os registros de cada janela e subdivide as que passam do limite de páginas"""
+        limite = MAX_PAGES * size
+        shards = []
+        pendentes = list(janelas)
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while pendentes:
+                contagens = list(executor.map(lambda janela: self._contar_registros(sess, *janela), pendentes))
+                proximas = []
+                
+                for (inicio_iso, fim_iso), total in zip(pendentes, contagens):
+                    if total is None:
+                        self.logger.warning(f"⚠️  Não foi possível contar os registros de {inicio_iso}")
+                        return None
+                    if total > limite:
+                        metades = dividir_janela_ao_meio(inicio_iso, fim_iso, SHARD_JANELA_MINIMA)
+                        if metades:
+                            proximas.extend(metades)
+                            continue
+                        self.logger.warning(f"⚠️  Janela {inicio_iso} tem {total} registros e não pode ser "
+                                            f"subdividida - limitada a {limite}")
+                    if total:
+                        shards.append((inicio_iso, fim_iso, total))
+                
+                pendentes = proximas
+        
+        shards.sort()
+        return shards
+    
+    def baixar_relatorio_sharded(self, periodo, workers=API_WORKERS, formato=FORMATO_SAIDA, janela=SHARD_JANELA):
+        """Baixa o período completo dividido em janelas de data que cabem no limite de páginas"""
+        try:
+            self.logger.info("🧩 Iniciando download via API em shards de data...")
+            print("📊 Baixando relatório via API (shards de data)...")
             
-            # 🔧 SOLUÇÃO SSL: Desativa verificação de certificado
-            sess.verify = False
+            inicio_iso, fim_iso = self.converter_periodo_para_iso(periodo)
+            if not inicio_iso or not fim_iso:
+                return None
             
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-                "Accept": "application/json, text/plain, */*",
-                "Origin": "https://avia.unipix.com.br",
-                "Referer": "https://avia.unipix.com.br/"
-            }
+            passo = timedelta(hours=1) if janela == "hora" else timedelta(days=1)
+            sess = self._criar_sessao_api(pool_size=workers)
+            ajustador = self._criar_ajustador()
+            size = ajustador.tamanho if ajustador else DEFAULT_PAGE_SIZE
+            spool = self._criar_spool({"modo": "sharded", "inicio": inicio_iso, "fim": fim_iso, "janela": janela})
+            if spool:
+                size = spool.fixar_tamanho(size)
+            
+            inicio = time.perf_counter()
+            shards = self._planejar_shards(sess, dividir_periodo_iso(inicio_iso, fim_iso, passo), workers, size=size)
+            if shards is None:
+                # Sem a contagem não há como planejar as janelas: segue pelas páginas do período inteiro
+                self.logger.warning("⚠️  Contagem por janela indisponível - baixando pelo modo de páginas")
+                if spool and not spool.manifesto["paginas"]:
+                    spool.descartar()
+                return self.baixar_relatorio_via_api(periodo, workers=workers, formato=formato, shard_automatico=False)
+            
+            tarefas = [
+                (shard_inicio, shard_fim, page, size)
+                for shard_inicio, shard_fim, total in shards
+                for page in range(min(math.ceil(total / size), MAX_PAGES))
+            ]
+            esperados = sum(total for _, _, total in shards)
+            self.logger.info(f"🧩 {len(shards)} shard(s), {len(tarefas)} página(s), {esperados} registros esperados")
             
-            if self.token:
-                headers["Authorization"] = f"Bearer {self.token}"
-                self.logger.info("🔑 Usando token JWT para autenticação")
-            else:
-                self.logger.info("🍪 Usando cookies para autenticação")
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            caminho_arquivo = os.path.join(self.download_folder, f"unipix_relatorio_{timestamp}.{formato}")
             
-            if self.cookies:
-                jar = cookies_selenium_para_requests(self.cookies, 
-                                                   target_domain="aws-api-sms-interna.unipix.com.br")
-                sess.cookies = jar
+            with EscritorRelatorio(caminho_arquivo, formato=formato, logger=self.logger) as escritor:
+                soma_latencias, completo = self._buscar_em_ordem(
+                    sess, tarefas, escritor, max(workers or 1, 1), ajustador=ajustador, spool=spool)
+            self._registrar_tempos(time.perf_counter() - inicio, soma_latencias, workers, sess)
+            self._finalizar_ajustador(ajustador)
+            self._encerrar_spool(spool, completo)
             
-            # Faz chamadas paginadas para a API
-            all_rows = []
-            page = 0
-            max_pages = 50  # Limite de segurança
+            if not completo and escritor.total_registros:
+                self.logger.warning("⚠️  Relatório INCOMPLETO - o arquivo contém só as páginas obtidas antes da falha")
+                print("⚠️  Atenção: relatório incompleto (veja o log)")
             
-            while page < max_pages:
-                params = build_params(inicio_iso, fim_iso, page=page, size=DEFAULT_PAGE_SIZE)
-                
-                self.logger.info(f"📄 Buscando página {page + 1}...")
-                
-                try:
-                    # 🔧 SOLUÇÃO SSL: verify=False na requisição também
-                    resp = sess.get(API_URL, headers=headers, params=params, timeout=180, verify=False)
-                    
-                    if resp.status_code == 401:
-                        self.logger.error("❌ 401 Não autorizado na API. Token/cookies inválidos.")
-                        break
-                    if resp.status_code >= 400:
-                        self.logger.error(f"❌ Falha na API ({resp.status_code}): {resp.text[:300]}")
-                        break
-                    
-                    # Processa resposta
-                    ctype = resp.headers.get("Content-Type", "")
-                    if "application/json" in ctype:
-                        data = resp.json()
-                        
-                        if isinstance(data, dict) and "content" in data:
-                            rows = data["content"] or []
-                            all_rows.extend(rows)
-                            
-                            self.logger.info(f"📊 Página {page + 1}: {len(rows)} registros")
-                            
-                            # Verifica se é a última página
-                            last_flag = data.get("last")
-                            total_pages = data.get("totalPages")
-                            total_elements = data.get("totalElements")
-                            
-                            if total_elements:
-                                self.logger.info(f"📈 Total de registros: {total_elements}")
-                            
-                            if last_flag is True:
-                                self.logger.info("✅ Última página alcançada")
-                                break
-                            if total_pages is not None and page + 1 >= int(total_pages):
-                                self.logger.info("✅ Todas as páginas processadas")
-                                break
-                            if len(rows) < DEFAULT_PAGE_SIZE:
-                                self.logger.info("✅ Fim dos dados (página incompleta)")
-                                break
-                        else:
-                            # Outros formatos de resposta
-                            rows = data.get("items") or data.get("rows") or []
-                            all_rows.extend(rows)
-                            self.logger.info(f"📊 Formato alternativo: {len(rows)} registros")
-                            if len(rows) < DEFAULT_PAGE_SIZE:
-                                break
-                    else:
-                        # Se não for JSON, trata como CSV
-                        self.logger.info("📄 Resposta em formato CSV detectada")
-                        df = pd.read_csv(pd.compat.StringIO(resp.text))
-                        all_rows = df.to_dict('records')
-                        break
-                    
-                    page += 1
-                    
-                except requests.exceptions.SSLError as ssl_error:
-                    self.logger.error(f"❌ Erro SSL (mesmo com verify=False): {ssl_error}")
-                    break
-                except requests.exceptions.RequestException as req_error:
-                    self.logger.error(f"❌ Erro de requisição: {req_error}")
-                    break
+            if escritor.total_registros != esperados:
+                self.logger.warning(f"⚠️  Esperados {esperados} registros, gravados {escritor.total_registros}")
             
-            # Converte para DataFrame
-            if all_rows:
-                df = pd.json_normalize(all_rows)
-                self.logger.info(f"✅ Dados obtidos: {len(df)} registros no total")
-                
-                # Salva arquivo
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                nome_arquivo = f"unipix_relatorio_{timestamp}.csv"
-                caminho_arquivo = os.path.join(self.download_folder, nome_arquivo)
-                
-                df.to_csv(caminho_arquivo, index=False, encoding="utf-8-sig")
+            if escritor.total_registros:
+                self.logger.info(f"✅ Dados obtidos: {escritor.total_registros} registros no total")
                 self.logger.info(f"💾 Arquivo salvo: {caminho_arquivo}")
-                
                 return caminho_arquivo
             else:
                 self.logger.warning("⚠️  Nenhum dado retornado pela API")
                 return None
                 
         except Exception as e:
-            self.logger.error(f"❌ Erro ao baixar relatório via API: {e}")
+            self.logger.error(f"❌ Erro ao baixar relatório em shards: {e}")
+            return None
+    
+    def baixar_relatorio_fanout(self, periodo, particoes, workers=API_WORKERS, formato=FORMATO_SAIDA,
+                                max_pages=MAX_PAGES):
+        """Baixa cada combinação de filtros como um job independente, com arquivo próprio
+        
+        particoes: lista de dicts de filtros, ex. [{"centroCusto": "CC01"}, {"centroCusto": "CC02"}]
+        (veja combinar_filtros). Todos os jobs dividem a mesma sessão autenticada; cada um tem
+        seu próprio limite de páginas, então partições grandes não seguram as pequenas.
+        """
+        try:
+            if not particoes:
+                self.logger.warning("⚠️  Nenhuma partição de filtros informada para o fan-out")
+                return []
+            
+            inicio_iso, fim_iso = self.converter_periodo_para_iso(periodo)
+            if not inicio_iso or not fim_iso:
+                return []
+            
+            self.logger.info(f"🌿 Fan-out em {len(particoes)} partição(ões) com {workers} job(s) simultâneo(s)...")
+            print(f"📊 Baixando relatório via API ({len(particoes)} partições)...")
+            
+            sess = self._criar_sessao_api(pool_size=workers)
+            ajustador = self._criar_ajustador()
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            
+            inicio = time.perf_counter()
+            arquivos = []
+            concluidas = 0
+            soma_latencias = 0.0
+            with ThreadPoolExecutor(max_workers=max(workers or 1, 1)) as executor:
+                futuros = {
+                    executor.submit(self._baixar_particao, sess, inicio_iso, fim_iso, filtros, formato,
+                                    timestamp, max_pages, ajustador): filtros
+                    for filtros in particoes
+                }
+                for futuro in as_completed(futuros):
+                    rotulo = rotulo_particao(futuros[futuro])
+                    concluidas += 1
+                    try:
+                        caminho, total, latencias, completo = futuro.result()
+                    except Exception as e:
+                        self.logger.error(f"❌ [{concluidas}/{len(particoes)}] {rotulo}: {e}")
+                        continue
+                    soma_latencias += latencias
+                    situacao = "" if completo else " (INCOMPLETA)"
+                    self.logger.info(f"✅ [{concluidas}/{len(particoes)}] {rotulo}: {total} registros{situacao}")
+                    if caminho:
+                        arquivos.append(caminho)
+            self._registrar_tempos(time.perf_counter() - inicio, soma_latencias, workers, sess)
+            self._finalizar_ajustador(ajustador)
+            
+            self.logger.info(f"💾 {len(arquivos)} arquivo(s) de partição gravado(s)")
+            return sorted(arquivos)
+            
+        except Exception as e:
+            self.logger.error(f"❌ Erro no fan-out por filtros: {e}")
+            return []
+    
+    def _baixar_particao(self, sess, inicio_iso, fim_iso, filtros, formato, timestamp, max_pages, ajustador):
+        """Job do fan-out: uma partição, arquivo e spool próprios - retorna (caminho, registros, latências, completo)"""
+        rotulo = rotulo_particao(filtros)
+        caminho_arquivo = os.path.join(self.download_folder, f"unipix_relatorio_{timestamp}_{rotulo}.{formato}")
+        spool = self._criar_spool({"modo": "fanout", "inicio": inicio_iso, "fim": fim_iso, "filtros": filtros})
+        size = ajustador.tamanho if ajustador else DEFAULT_PAGE_SIZE
+        if spool:
+            size = spool.fixar_tamanho(size)
+        
+        self.logger.info(f"🌿 Iniciando partição {rotulo}")
+        with EscritorRelatorio(caminho_arquivo, formato=formato, logger=self.logger) as escritor:
+            # O ajustador é de todas as partições: cada job fica no size com que começou
+            soma_latencias, completo = self._baixar_paginas_sequencial(
+                sess, inicio_iso, fim_iso, escritor, filtros=filtros, size=size, ajustador=ajustador,
+                spool=spool, max_pages=max_pages, size_fixo=True)
+        self._encerrar_spool(spool, completo)
+        
+        return (caminho_arquivo if escritor.total_registros else None), escritor.total_registros, soma_latencias, completo
+    
+    def baixar_relatorio_incremental(self, periodo=None, filtros=None, conta=None, campo=WATERMARK_CAMPO,
+                                     workers=API_WORKERS, formato=FORMATO_SAIDA):
+        """Baixa só o delta desde a última marca d'água da conta + filtros
+        
+        Sem período, usa o mês atual. campo="status" pede as mudanças de status desde a marca
+        (dataInicialStatus); campo="envio" pede só os novos envios (dataInicialEnvio).
+        """
+        try:
+            conta = conta or self._conta()
+            filtros = filtros or {}
+            store = WatermarkStore(os.path.join(self.config.state_folder, "watermarks.json"), self.logger)
+            marca = store.obter(conta, filtros)
+            
+            if periodo:
+                inicio_iso, fim_iso = self.converter_periodo_para_iso(periodo)
+                if not inicio_iso or not fim_iso:
+                    return None
+            else:
+                inicio_iso, fim_iso, _ = first_last_of_current_month_utc_isoz()
+            
+            # Mesma convenção de converter_periodo_para_iso: hora local rotulada com "Z"
+            agora_iso = datetime_para_iso(datetime.now().replace(microsecond=0))
+            chave_marca = "dataInicialStatus" if campo == "status" else "dataInicialEnvio"
+            consulta = dict(filtros)
+            
+            if marca and marca.get(chave_marca):
+                # Pequena sobreposição para não perder registros gravados com atraso
+                desde = datetime_para_iso(iso_para_datetime(marca[chave_marca]) - WATERMARK_SOBREPOSICAO)
+                if campo == "status":
+                    consulta["dataInicialStatus"] = desde
+                    consulta["dataFinalStatus"] = agora_iso
+                else:
+                    inicio_iso = max(inicio_iso, desde)
+                self.logger.info(f"🔁 Extração incremental ({campo}) desde {desde} "
+                                 f"- última execução trouxe {marca.get('ultimos_registros', 0)} registros")
+            else:
+                self.logger.info("🆕 Sem marca d'água para esta conta/filtros: carga completa do período")
+            
+            print("📊 Baixando delta do relatório via API...")
+            sess = self._criar_sessao_api(pool_size=workers)
+            
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            caminho_arquivo = os.path.join(self.download_folder, f"unipix_incremental_{timestamp}.{formato}")
+            
+            ajustador = self._criar_ajustador()
+            inicio = time.perf_counter()
+            with EscritorRelatorio(caminho_arquivo, formato=formato, logger=self.logger) as escritor:
+                # Sem MAX_PAGES: um delta truncado nunca deixaria a marca d'água avançar
+                if workers and workers > 1:
+                    soma_latencias, completo = self._baixar_paginas_concorrente(
+                        sess, inicio_iso, fim_iso, escritor, workers, filtros=consulta, ajustador=ajustador,
+                        max_pages=None)
+                else:
+                    soma_latencias, completo = self._baixar_paginas_sequencial(
+                        sess, inicio_iso, fim_iso, escritor, filtros=consulta, ajustador=ajustador,
+                        max_pages=None)
+            self._registrar_tempos(time.perf_counter() - inicio, soma_latencias, workers, sess)
+            self._finalizar_ajustador(ajustador)
+            
+            if completo:
+                # Só avança a marca quando o delta inteiro foi gravado
+                salva = store.salvar(conta, filtros, {
+                    "dataInicialEnvio": min(agora_iso, fim_iso),
+                    "dataInicialStatus": agora_iso,
+                    "ultimos_registros": escritor.total_registros,
+                    "total_registros": (marca or {}).get("total_registros", 0) + escritor.total_registros
+                })
+                if salva:
+                    self.logger.info(f"🔖 Marca d'água atualizada para {agora_iso}")
+            else:
+                self.logger.warning("⚠️  Delta incompleto - marca d'água mantida para a próxima execução")
+            
+            if escritor.total_registros:
+                self.logger.info(f"✅ Delta obtido: {escritor.total_registros} registros")
+                self.logger.info(f"💾 Arquivo salvo: {caminho_arquivo}")
+                return caminho_arquivo
+            else:
+                self.logger.info("✅ Nenhum registro novo desde a última execução")
+                return None
+                
+        except Exception as e:
+            self.logger.error(f"❌ Erro na extração incremental: {e}")
             return None
     
+    def baixar_relatorios_async(self, consultas, limite_concorrencia=ASYNC_CONCORRENCIA):
+        """Baixa várias consultas de uma vez pelo motor asyncio - uma por arquivo CSV
+        
+        consultas: lista de dicts {"periodo": "DD/MM/AAAA - DD/MM/AAAA", "filtros": {...}}
+        """
+        try:
+            if aiohttp is None:
+                self.logger.error("❌ Motor asyncio requer aiohttp (pip install aiohttp)")
+                return []
+            
+            consultas_iso = []
+            for consulta in consultas:
+                inicio_iso, fim_iso = self.converter_periodo_para_iso(consulta["periodo"])
+                if not inicio_iso or not fim_iso:
+                    continue
+                consultas_iso.append({
+                    "periodo": consulta["periodo"],
+                    "inicio_iso": inicio_iso,
+                    "fim_iso": fim_iso,
+                    "filtros": consulta.get("filtros") or {}
+                })
+            
+            self.logger.info(f"⚡ Extraindo {len(consultas_iso)} consulta(s) via asyncio "
+                             f"(limite de {limite_concorrencia} requisições simultâneas)...")
+            
+            ajustador = self._criar_ajustador()
+            cliente = ClienteAPIAsync(self.logger, token=self.token, cookies=self.cookies,
+                                      api_url=self.api_url, limite_concorrencia=limite_concorrencia,
+                                      page_size=ajustador.tamanho if ajustador else DEFAULT_PAGE_SIZE,
+                                      ajustador=ajustador)
+            inicio = time.perf_counter()
+            resultados = asyncio.run(cliente.extrair_consultas(consultas_iso))
+            self.logger.info(f"⏱️  Extração asyncio concluída em {time.perf_counter() - inicio:.1f}s")
+            self._finalizar_ajustador(ajustador)
+            if cliente.limitador.ativo:
+                self.logger.info(f"⏳ Limitador: {cliente.espera_limitador:.1f}s esperando vs "
+                                 f"{cliente.tempo_rede:.1f}s na rede")
+            if cliente.retries:
+                self.logger.info(f"🔁 {cliente.retries} nova(s) tentativa(s) no motor asyncio")
+            
+            arquivos = []
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            for indice, (consulta, resultado) in enumerate(zip(consultas_iso, resultados), 1):
+                if isinstance(resultado, Exception):
+                    self.logger.error(f"❌ Consulta {consulta['periodo']} falhou: {resultado}")
+                    continue
+                rows, completo = resultado
+                if not rows:
+                    if completo:
+                        self.logger.warning(f"⚠️  Nenhum dado para a consulta {consulta['periodo']}")
+                    else:
+                        self.logger.error(f"❌ Consulta {consulta['periodo']} falhou sem nenhuma página")
+                    continue
+                
+                df = registros_para_dataframe(rows)
+                sufixo = "" if completo else "_INCOMPLETO"
+                caminho_arquivo = os.path.join(self.download_folder,
+                                               f"unipix_relatorio_{timestamp}_{indice:02d}{sufixo}.csv")
+                df.to_csv(caminho_arquivo, index=False, encoding="utf-8-sig")
+                if not completo:
+                    # Fica no disco para conferência, mas não entra na lista de relatórios prontos
+                    self.logger.warning(f"⚠️  Consulta {consulta['periodo']} INCOMPLETA: {len(df)} registros "
+                                        f"parciais em {caminho_arquivo}")
+                    print(f"⚠️  Atenção: consulta {consulta['periodo']} incompleta (veja o log)")
+                    continue
+                self.logger.info(f"💾 Consulta {consulta['periodo']}: {len(df)} registros em {caminho_arquivo}")
+                arquivos.append(caminho_arquivo)
+            
+            return arquivos
+            
+        except Exception as e:
+            self.logger.error(f"❌ Erro na extração asyncio: {e}")
+            return []
+    
     def executar_rotina_completa(self):
         """Executa toda a rotina da Unipix usando API"""
         try:
@@ -822,12 +3086,27 @@ class UnipixScraperAPI:
             if not credenciais:
                 return 0
             
-            # 2. Fazer login e extrair token/cookies
-            if not self.fazer_login_unipix(credenciais['usuario'], credenciais['senha']):
+            # 2. Reaproveitar sessão em cache ou fazer login e extrair token/cookies
+            if not self.autenticar(credenciais['usuario'], credenciais['senha']):
                 return 0
             
             # 3. Baixar relatório via API
-            arquivo_baixado = self.baixar_relatorio_via_api(credenciais['periodo'])
+            if MODO_EXTRACAO == "fanout":
+                arquivos = self.baixar_relatorio_fanout(credenciais['periodo'], FANOUT_PARTICOES)
+                if arquivos:
+                    print(f"\n🎉 ROTINA CONCLUÍDA COM SUCESSO!")
+                    for arquivo in arquivos:
+                        print(f"📁 Arquivo salvo em: {arquivo}")
+                else:
+                    print("\n❌ Falha no download do relatório")
+                return len(arquivos)
+            
+            if MODO_EXTRACAO == "sharded":
+                arquivo_baixado = self.baixar_relatorio_sharded(credenciais['periodo'])
+            elif MODO_EXTRACAO == "incremental":
+                arquivo_baixado = self.baixar_relatorio_incremental(credenciais['periodo'], conta=credenciais['usuario'])
+            else:
+                arquivo_baixado = self.baixar_relatorio_via_api(credenciais['periodo'])
             
             if arquivo_baixado:
                 print(f"\n🎉 ROTINA CONCLUÍDA COM SUCESSO!")
@@ -847,24 +3126,152 @@ class UnipixScraperAPI:
                 self.driver.quit()
                 self.logger.info("✅ Navegador fechado")
 
+# =============================================================================
+# POOL DE SESSÕES MULTI-CONTA
+# =============================================================================
+class PoolSessoes:
+    """Mantém uma sessão autenticada da API por conta e extrai todas em paralelo
+    
+    Cada conta tem o próprio scraper (token, cookies, planilha de 2FA e pasta de saída);
+    as requisições de todas dividem o orçamento global de concorrência e o limitador de taxa.
+    """
+    def __init__(self, config, contas=None, download_folder=None):
+        self.config = config
+        self.logger = config.logger
+        self.contas = CONTAS_UNIPIX if contas is None else contas
+        self.download_folder = download_folder or config.input_folder
+        self.sessoes = {}  # usuario -> UnipixScraperAPI autenticado
+    
+    def _validar_contas(self):
+        """Avisa quando duas contas leem o 2FA da mesma planilha (os códigos se misturariam)"""
+        vistas = {}
+        for conta in self.contas:
+            fonte = conta.get("planilha_2fa") or "(planilha padrão)"
+            if fonte in vistas:
+                self.logger.warning(f"⚠️  Contas {vistas[fonte]} e {conta['usuario']} usam a mesma fonte de 2FA: {fonte}")
+            vistas.setdefault(fonte, conta["usuario"])
+    
+    def autenticar_todas(self, logins_simultaneos=POOL_LOGINS_SIMULTANEOS):
+        """Faz login (ou reaproveita o cache) de todas as contas em paralelo"""
+        self._validar_contas()
+        # Cria a chave do cache de sessão antes dos logins paralelos disputarem o arquivo
+        SessaoCache(self.config.state_folder, self.logger)
+        
+        self.logger.info(f"👥 Autenticando {len(self.contas)} conta(s), {logins_simultaneos} por vez...")
+        with ThreadPoolExecutor(max_workers=max(logins_simultaneos, 1)) as executor:
+            futuros = {executor.submit(self._autenticar_conta, conta): conta["usuario"] for conta in self.contas}
+            for futuro in as_completed(futuros):
+                usuario = futuros[futuro]
+                try:
+                    scraper = futuro.result()
+                except Exception as e:
+                    self.logger.error(f"❌ Login da conta {usuario} falhou: {e}")
+                    continue
+                if scraper:
+                    self.sessoes[usuario] = scraper
+                    self.logger.info(f"✅ Conta {usuario} autenticada")
+                else:
+                    self.logger.error(f"❌ Conta {usuario} não autenticada")
+        
+        return len(self.sessoes)
+    
+    def _autenticar_conta(self, conta):
+        """Login de uma conta com a própria planilha de 2FA; fecha o navegador ao final"""
+        pasta = os.path.join(self.download_folder, re.sub(r"[^\w.-]+", "_", conta["usuario"]))
+        os.makedirs(pasta, exist_ok=True)
+        scraper = UnipixScraperAPI(self.config, pasta, planilha_2fa=conta.get("planilha_2fa"))
+        try:
+            return scraper if scraper.autenticar(conta["usuario"], conta["senha"]) else None
+        finally:
+            if scraper.driver:
+                scraper.driver.quit()
+                scraper.driver = None
+    
+    def executar(self, periodo, modo=MODO_EXTRACAO, contas_simultaneas=None):
+        """Extrai o período em todas as contas autenticadas - retorna {usuario: [arquivos]}"""
+        resultados = {}
+        if not self.sessoes:
+            self.logger.warning("⚠️  Nenhuma conta autenticada no pool")
+            return resultados
+        
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=contas_simultaneas or len(self.sessoes)) as executor:
+            futuros = {
+                executor.submit(self._extrair_conta, scraper, periodo, modo): usuario
+                for usuario, scraper in self.sessoes.items()
+            }
+            for futuro in as_completed(futuros):
+                usuario = futuros[futuro]
+                try:
+                    resultados[usuario] = futuro.result()
+                except Exception as e:
+                    self.logger.error(f"❌ Extração da conta {usuario} falhou: {e}")
+                    resultados[usuario] = []
+                self.logger.info(f"📦 Conta {usuario}: {len(resultados[usuario])} arquivo(s)")
+        
+        self.logger.info(f"⏱️  {len(self.sessoes)} conta(s) extraídas em {time.perf_counter() - inicio:.1f}s")
+        return resultados
+    
+    def _extrair_conta(self, scraper, periodo, modo):
+        if modo == "fanout":
+            return scraper.baixar_relatorio_fanout(periodo, FANOUT_PARTICOES)
+        if modo == "sharded":
+            arquivo = scraper.baixar_relatorio_sharded(periodo)
+        elif modo == "incremental":
+            arquivo = scraper.baixar_relatorio_incremental(periodo)
+        else:
+            arquivo = scraper.baixar_relatorio_via_api(periodo)
+        return [arquivo] if arquivo else []
+
+def executar_multicontas(config):
+    """Rotina do menu: autentica todas as contas do registro e extrai o mesmo período"""
+    print("\n" + "="*70)
+    print(f"👥 UNIPIX - {len(CONTAS_UNIPIX)} CONTA(S) EM PARALELO")
+    print("="*70)
+    for conta in CONTAS_UNIPIX:
+        print(f"👤 {conta['usuario']} (2FA: {conta.get('planilha_2fa') or 'planilha padrão'})")
+    
+    print("\n📅 PERÍODO DO RELATÓRIO ANALÍTICO")
+    print("💡 Formato: DD/MM/AAAA - DD/MM/AAAA")
+    periodo = input("📅 Digite o período (ex: 03/10/2024 - 17/10/2024): ").strip()
+    if not periodo or ' - ' not in periodo:
+        print("❌ Período no formato inválido! Use: DD/MM/AAAA - DD/MM/AAAA")
+        return 0
+    
+    pool = PoolSessoes(config)
+    if not pool.autenticar_todas():
+        print("\n❌ Nenhuma conta autenticada")
+        return 0
+    
+    resultados = pool.executar(periodo)
+    total = 0
+    for usuario, arquivos in sorted(resultados.items()):
+        print(f"\n👤 {usuario}: {len(arquivos)} arquivo(s)")
+        for arquivo in arquivos:
+            print(f"   📁 {arquivo}")
+        total += len(arquivos)
+    return total
+
 # =============================================================================
 # FUNÇÃO PRINCIPAL
 # =============================================================================
 def main():
     try:
         config = Config()
+        config.logger.info(f"⏱️  Imports do módulo em {TEMPO_IMPORTS * 1000:.0f} ms")
         
         while True:
             print("\n" + "="*70)
             print("🚀 UNIPIX ETL - VERSÃO API (SSL FIX)")
             print("="*70)
             print("1 - 🏢 Web Scraping UniPix (API + Tokens + SSL Fix)")
-            print("2 - 🚪 Sair")
+            print(f"2 - 👥 Várias contas em paralelo ({len(CONTAS_UNIPIX)} no registro)")
+            print("3 - 🚪 Sair")
             print("="*70)
             print("💡 Nova abordagem: Login via Selenium + Dados via API")
             print("🔧 SSL: Problema de certificado resolvido")
             
-            opcao = input("\n📋 Digite sua opção (1-2): ").strip()
+            opcao = input("\n📋 Digite sua opção (1-3): ").strip()
             
             if opcao == "1":
                 scraper = UnipixScraperAPI(config, config.input_folder)
@@ -876,6 +3283,10 @@ def main():
                     input("\n⏎ Nenhum arquivo baixado. Enter para continuar...")
                     
             elif opcao == "2":
+                resultado = executar_multicontas(config)
+                input(f"\n⏎ {resultado} arquivo(s) baixado(s). Enter para continuar...")
+                
+            elif opcao == "3":
                 print("\n👋 Saindo do sistema...")
                 break
             else:
@@ -1,7 +1,9 @@
 # main.py - ETL COM WEB SCRAPING UNIPIX + 2FA - VERSÃO ULTIMATE
+import time
+_INICIO_IMPORTS = time.perf_counter()
 import os
-import pandas as pd
-import numpy as np
+import importlib
+import importlib.util
 import sqlite3
 from datetime import datetime
 import logging
@@ -9,14 +11,70 @@ import shutil
 import zipfile
 import tempfile
 import getpass
-import time
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.action_chains import ActionChains
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+import re
+import json
+import threading
+
+try:
+    from watchdog.observers import Observer  # Opcional: notificação de mudança na planilha de 2FA
+except ImportError:
+    Observer = None
+
+# =============================================================================
+# IMPORTAÇÃO TARDIA (STARTUP RÁPIDO)
+# =============================================================================
+TEMPOS_IMPORTACAO = {}  # módulo -> segundos gastos no import tardio
+
+class ModuloTardio:
+    """Importa o módulo só no primeiro acesso a um atributo (menu e caminhos curtos não pagam o import)"""
+    def __init__(self, nome):
+        self._nome = nome
+        self._modulo = None
+    
+    def __getattr__(self, atributo):
+        if self._modulo is None:
+            inicio = time.perf_counter()
+            self._modulo = importlib.import_module(self._nome)
+            TEMPOS_IMPORTACAO[self._nome] = time.perf_counter() - inicio
+            logging.getLogger('ETL').info(f"📦 {self._nome} importado em {TEMPOS_IMPORTACAO[self._nome] * 1000:.0f} ms")
+        return getattr(self._modulo, atributo)
+
+def importar_tardio(nome, opcional=False):
+    """Proxy de import tardio; com opcional=True devolve None se o pacote não estiver instalado"""
+    if opcional and importlib.util.find_spec(nome.split(".")[0]) is None:
+        return None
+    return ModuloTardio(nome)
+
+class _SeleniumNaoCarregado(Exception):
+    """Ocupa o lugar das exceções do Selenium nos except antes de carregar_selenium()"""
+
+webdriver = By = WebDriverWait = EC = Options = ActionChains = None
+TimeoutException = NoSuchElementException = _SeleniumNaoCarregado
+StaleElementReferenceException = WebDriverException = _SeleniumNaoCarregado
+
+def carregar_selenium():
+    """Importa o Selenium só quando o navegador é realmente aberto"""
+    global webdriver, By, WebDriverWait, EC, Options, ActionChains, TimeoutException, NoSuchElementException
+    global StaleElementReferenceException, WebDriverException
+    if webdriver is not None:
+        return
+    inicio = time.perf_counter()
+    from selenium import webdriver
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.common.action_chains import ActionChains
+    from selenium.common.exceptions import TimeoutException, NoSuchElementException
+    from selenium.common.exceptions import StaleElementReferenceException, WebDriverException
+    TEMPOS_IMPORTACAO["selenium"] = time.perf_counter() - inicio
+    logging.getLogger('ETL').info(f"📦 selenium importado em {TEMPOS_IMPORTACAO['selenium'] * 1000:.0f} ms")
+
+# Pacotes pesados: importados no primeiro uso
+pd = importar_tardio("pandas")
+np = importar_tardio("numpy")
+
+TEMPO_IMPORTS = time.perf_counter() - _INICIO_IMPORTS  # Custo de carregar o módulo (logado no main)
 
 # =============================================================================
 # CONFIGURAÇÕES GLOBAIS 
@@ -24,6 +82,17 @@ from selenium.common.exceptions import TimeoutException, NoSuchElementException
 UNIPIX_USUARIO = "xxxxxxxxxx"
 UNIPIX_SENHA = "xxxxxxx"
 DOWNLOAD_FOLDER = r"C:\Users\xxxxxxxx\Desktop\aprendizado\data\input"
+LOGIN_URL = "https://avia.unipix.com.br/#/login"
+LOGIN_TIMEOUT = 30  # Timeout de cada espera explícita do login no navegador (segundos)
+LOGIN_TIMEOUT_2FA = 120  # Tempo máximo aguardando a planilha receber o código 2FA (segundos)
+PLANILHA_POLL_FALLBACK = 0.5  # Intervalo de checagem da planilha de 2FA sem watchdog (segundos)
+PLANILHA_POLL_SEGURANCA = 5  # Checagem extra com watchdog, para pastas sincronizadas que não notificam
+DOWNLOAD_TIMEOUT = 1800  # Teto da espera pelo arquivo do relatório (segundos)
+DOWNLOAD_SEM_PROGRESSO = 120  # Desiste se nenhum arquivo surgir ou crescer nesse intervalo (segundos)
+DOWNLOAD_ESTABILIDADE = 1.0  # Tamanho parado por esse tempo = download concluído (segundos)
+DOWNLOAD_POLL = 0.5  # Intervalo de checagem da pasta de download (segundos)
+SELETOR_TIMEOUT = 30  # Espera do primeiro XPath de cada controle (o do cache, quando houver)
+SELETOR_TIMEOUT_FALLBACK = 3  # Espera de cada XPath alternativo depois que o primeiro falhou
 
 # =============================================================================
 # CONFIGURAÇÕES
@@ -36,9 +105,10 @@ class Config:
         self.processed_folder = os.path.join(self.base_dir, 'data', 'processed') 
         self.error_folder = os.path.join(self.base_dir, 'data', 'error')
         self.temp_folder = os.path.join(self.base_dir, 'data', 'temp')
+        self.state_folder = os.path.join(self.base_dir, 'data', 'state')  # Estado entre execuções
         
         # Criar pastas
-        for folder in [self.input_folder, self.processed_folder, self.error_folder, self.temp_folder]:
+        for folder in [self.input_folder, self.processed_folder, self.error_folder, self.temp_folder, self.state_folder]:
             os.makedirs(folder, exist_ok=True)
         
         # Mapeamento colunas
@@ -75,6 +145,18 @@ class Config:
 # LEITOR DE CÓDIGO DA PLANILHA EXCEL
 # =============================================================================
 
+class ObservadorPlanilha:
+    """Handler do watchdog: sinaliza o evento quando o arquivo da planilha é criado/alterado/movido"""
+    def __init__(self, caminho, evento):
+        self.caminho = os.path.normcase(os.path.abspath(caminho))
+        self.evento = evento
+    
+    def dispatch(self, event):
+        for caminho in (getattr(event, "src_path", None), getattr(event, "dest_path", None)):
+            if caminho and os.path.normcase(os.path.abspath(caminho)) == self.caminho:
+                self.evento.set()
+                return
+
 class PlanilhaCodeReader:
     def __init__(self, config):
         self.config = config
@@ -82,107 +164,105 @@ class PlanilhaCodeReader:
         # CAMINHO CORRETO DA PLANILHA CSV
         self.caminho_planilha = r"C:\Users\marlon.carvalho\OneDrive - Ministério do Desenvolvimento e Assistência Social\Documentos\Unip\cod_unipix.csv"
     
+    def _aguardar_evento(self, condicao, tempo_maximo):
+        """Espera condicao() ficar verdadeira, reavaliando a cada gravação no arquivo
+        
+        Com watchdog acorda pela notificação do sistema de arquivos (mais uma checagem de
+        segurança a cada PLANILHA_POLL_SEGURANCA s, pois pastas sincronizadas nem sempre notificam);
+        sem watchdog cai para polling curto.
+        """
+        limite = time.monotonic() + tempo_maximo
+        mudou = threading.Event()
+        observador = None
+        pasta = os.path.dirname(os.path.abspath(self.caminho_planilha))
+        if Observer is not None and os.path.isdir(pasta):
+            observador = Observer()
+            observador.schedule(ObservadorPlanilha(self.caminho_planilha, mudou), pasta, recursive=False)
+            observador.start()
+        intervalo = PLANILHA_POLL_SEGURANCA if observador else PLANILHA_POLL_FALLBACK
+        
+        try:
+            while True:
+                if condicao():
+                    return True
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    return False
+                mudou.wait(min(intervalo, restante))
+                mudou.clear()
+        finally:
+            if observador:
+                observador.stop()
+                observador.join(timeout=2)
+    
+    def _tamanho(self):
+        try:
+            return os.path.getsize(self.caminho_planilha)
+        except OSError:
+            return 0
+    
+    def _modificado_em(self):
+        try:
+            return os.path.getmtime(self.caminho_planilha)
+        except OSError:
+            return 0.0
+    
     def aguardar_planilha_pronta(self, tempo_maximo=180):
-        """Aguarda a planilha ficar disponível e estável"""
+        """Aguarda a planilha existir com conteúdo"""
+        self.logger.info(f"⏳ Aguardando planilha ficar pronta (máximo {tempo_maximo}s)...")
+        if self._aguardar_evento(lambda: self._tamanho() > 0, tempo_maximo):
+            return True
+        self.logger.error("❌ Timeout - Planilha não ficou pronta a tempo")
+        return False
+    
+    def aguardar_atualizacao(self, desde, tempo_maximo=LOGIN_TIMEOUT_2FA):
+        """Espera a planilha ser regravada depois de `desde` (epoch) - True se atualizou a tempo"""
+        if self._aguardar_evento(lambda: self._modificado_em() > desde, tempo_maximo):
+            self.logger.info("📊 Planilha atualizada após o envio do login")
+            return True
+        self.logger.warning(f"⚠️  Planilha não foi atualizada em {tempo_maximo}s")
+        return False
+    
+    def ler_primeira_celula(self):
+        """Lê só a célula A1: a primeira linha do arquivo até o primeiro separador"""
         try:
-            self.logger.info(f"⏳ Aguardando planilha ficar pronta (máximo {tempo_maximo}s)...")
-            
-            tempo_inicio = time.time()
-            ultimo_tamanho = 0
-            tentativas_estavel = 0
-            
-            while time.time() - tempo_inicio < tempo_maximo:
-                # Verifica se o arquivo existe
-                if not os.path.exists(self.caminho_planilha):
-                    self.logger.info("📁 Planilha ainda não encontrada, aguardando...")
-                    time.sleep(5)
-                    continue
-                
-                try:
-                    # Tenta acessar o arquivo
-                    tamanho_atual = os.path.getsize(self.caminho_planilha)
-                    
-                    # Se o tamanho mudou recentemente, espera estabilizar
-                    if tamanho_atual != ultimo_tamanho:
-                        self.logger.info(f"📊 Planilha detectada, tamanho: {tamanho_atual} bytes")
-                        ultimo_tamanho = tamanho_atual
-                        tentativas_estavel = 0
-                        time.sleep(2)
-                        continue
-                    
-                    # Se o tamanho está estável por 3 verificações, considera pronto
-                    tentativas_estavel += 1
-                    if tentativas_estavel >= 3:
-                        self.logger.info("✅ Planilha estável e pronta para leitura")
-                        return True
-                    
-                    time.sleep(2)
-                    
-                except OSError as e:
-                    self.logger.info(f"⚠️  Arquivo ainda não acessível: {e}")
-                    time.sleep(3)
-                    continue
-            
-            self.logger.error("❌ Timeout - Planilha não ficou pronta a tempo")
-            return False
-            
-        except Exception as e:
-            self.logger.error(f"❌ Erro ao aguardar planilha: {e}")
-            return False
+            with open(self.caminho_planilha, "rb") as f:
+                linha = f.readline(4096)
+        except OSError as e:
+            self.logger.info(f"⚠️  Arquivo ainda não acessível: {e}")
+            return None
+        try:
+            texto = linha.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            texto = linha.decode("cp1252", errors="replace")
+        celula = re.split(r"[,;\t]", texto.strip(), maxsplit=1)[0]
+        return celula.strip().strip('"').strip() or None
     
-    def ler_codigo_da_planilha(self):
-        """Lê o código da célula 1A da planilha CSV - MANTÉM FORMATAÇÃO ORIGINAL"""
+    def ler_codigo_da_planilha(self, tempo_maximo=180):
+        """Lê o código da célula A1; se ainda não for válido, espera a próxima gravação do arquivo"""
         try:
-            # AGUARDA A PLANILHA FICAR PRONTA PRIMEIRO
-            if not self.aguardar_planilha_pronta():
+            if not self.aguardar_planilha_pronta(tempo_maximo):
                 return None
             
             self.logger.info(f"📊 Lendo planilha CSV: {self.caminho_planilha}")
+            limite = time.monotonic() + tempo_maximo
+            
+            while True:
+                lido_em = self._modificado_em()
+                codigo = self.ler_primeira_celula()
+                if codigo:
+                    self.logger.info(f"✅ Código lido da planilha: {codigo}")
+                    if self.validar_formato_codigo(codigo):
+                        return codigo
+                else:
+                    self.logger.warning("⚠️  Célula A1 vazia")
+                
+                # Gravação pela metade ou código antigo: espera o arquivo mudar de novo
+                restante = limite - time.monotonic()
+                if restante <= 0 or not self._aguardar_evento(lambda: self._modificado_em() != lido_em, restante):
+                    break
             
-            # Tenta ler o arquivo CSV
-            for tentativa in range(5):  # Tenta até 5 vezes
-                try:
-                    # Lê o arquivo CSV - tenta diferentes encodings
-                    try:
-                        df = pd.read_csv(self.caminho_planilha, header=None, encoding='utf-8')
-                    except UnicodeDecodeError:
-                        try:
-                            df = pd.read_csv(self.caminho_planilha, header=None, encoding='latin-1')
-                        except UnicodeDecodeError:
-                            df = pd.read_csv(self.caminho_planilha, header=None, encoding='cp1252')
-                    
-                    # Verifica se tem dados
-                    if df.empty:
-                        self.logger.warning(f"⚠️  Planilha vazia na tentativa {tentativa + 1}")
-                        time.sleep(3)
-                        continue
-                    
-                    # A célula 1A geralmente é a linha 0, coluna 0 no pandas
-                    codigo = df.iloc[0, 0] if not df.empty else None
-                    
-                    if pd.isna(codigo) or codigo == "" or str(codigo).strip() == "":
-                        self.logger.warning(f"⚠️  Célula A1 vazia na tentativa {tentativa + 1}")
-                        time.sleep(3)
-                        continue
-                    
-                    # Converte para string e limpa - MANTÉM CASE ORIGINAL
-                    codigo_str = str(codigo).strip()  # ⬅️ REMOVIDO .upper()
-                    self.logger.info(f"✅ Código lido da planilha: {codigo_str}")
-                    
-                    # Valida o formato (agora aceita maiúsculas e minúsculas)
-                    if self.validar_formato_codigo(codigo_str):
-                        return codigo_str
-                    else:
-                        self.logger.warning(f"⚠️  Código com formato inválido: {codigo_str}")
-                        time.sleep(3)
-                        continue
-                        
-                except Exception as e:
-                    self.logger.warning(f"⚠️  Erro na tentativa {tentativa + 1}: {e}")
-                    time.sleep(3)
-                    continue
-            
-            self.logger.error("❌ Todas as tentativas de leitura falharam")
+            self.logger.error("❌ Nenhum código válido na planilha dentro do prazo")
             return None
             
         except Exception as e:
@@ -307,9 +387,200 @@ class GestorArquivos:
         except Exception as e:
             self.logger.error(f"❌ Erro ao limpar pasta temp: {e}")
 
+class MonitorDownload:
+    """Identifica o arquivo de um download do navegador comparando a pasta antes e depois do clique
+    
+    O download termina quando surge um arquivo novo (ou regravado) com extensão final, sem
+    .crdownload/.part pendente na pasta e com o tamanho parado por DOWNLOAD_ESTABILIDADE segundos.
+    """
+    TEMPORARIOS = ('.crdownload', '.part', '.tmp')
+    
+    def __init__(self, pasta, extensoes=('.zip', '.csv', '.xlsx', '.xls'), logger=None):
+        self.pasta = pasta
+        self.extensoes = extensoes
+        self.logger = logger or logging.getLogger('ETL')
+        self.antes = {}
+    
+    def _listar(self):
+        """nome -> (tamanho, mtime) dos arquivos da pasta"""
+        estado = {}
+        for nome in os.listdir(self.pasta):
+            try:
+                info = os.stat(os.path.join(self.pasta, nome))
+            except OSError:
+                continue  # Renomeado pelo navegador durante a listagem
+            estado[nome] = (info.st_size, info.st_mtime)
+        return estado
+    
+    def capturar(self):
+        """Fotografa a pasta - chamar logo antes do clique que dispara o download"""
+        self.antes = self._listar()
+    
+    def aguardar(self, tempo_maximo=DOWNLOAD_TIMEOUT, sem_progresso=DOWNLOAD_SEM_PROGRESSO,
+                 estabilidade=DOWNLOAD_ESTABILIDADE):
+        """Caminho do arquivo baixado, ou None se estourar o teto ou o download parar de progredir"""
+        inicio = ultimo_progresso = time.monotonic()
+        vistos = {}
+        candidato = None  # (nome, tamanho) em observação
+        estavel_desde = None
+        
+        while True:
+            agora = time.monotonic()
+            novos = {nome: info for nome, info in self._listar().items() if self.antes.get(nome) != info}
+            if novos != vistos:
+                vistos = novos
+                ultimo_progresso = agora
+            
+            pendentes = [nome for nome in novos if nome.lower().endswith(self.TEMPORARIOS)]
+            prontos = [nome for nome in novos if nome.lower().endswith(self.extensoes)]
+            
+            if prontos and not pendentes:
+                nome = max(prontos, key=lambda n: novos[n][1])
+                atual = (nome, novos[nome][0])
+                if atual != candidato:
+                    candidato = atual
+                    estavel_desde = agora
+                elif atual[1] > 0 and agora - estavel_desde >= estabilidade:
+                    self.logger.info(f"✅ Download concluído: {nome} ({atual[1] / 1024:.0f} KB em {agora - inicio:.1f}s)")
+                    return os.path.join(self.pasta, nome)
+            else:
+                candidato = None
+            
+            if agora - inicio >= tempo_maximo:
+                self.logger.error(f"❌ Download não terminou em {tempo_maximo}s")
+                return None
+            if agora - ultimo_progresso >= sem_progresso:
+                self.logger.error(f"❌ Download sem progresso há {sem_progresso}s")
+                return None
+            time.sleep(DOWNLOAD_POLL)
+
+# =============================================================================
+# CACHE DE SELETORES (QUAL XPATH FUNCIONOU POR ÚLTIMO)
+# =============================================================================
+class CacheSeletores:
+    """Guarda, por controle da página, o XPath que funcionou por último (data/state/seletores.json)
+    
+    Na próxima execução esse XPath é tentado primeiro. Se ele falhar é rebaixado, e o
+    contador de rebaixamentos indica que a interface do site mudou. XPaths pega-tudo
+    (só tag e @type, ex. //input[@type='text']) nunca vão para o cache: na frente da
+    lista eles casariam com o campo errado antes dos específicos.
+    """
+    GENERICO = re.compile(r"^//[\w*]+(\[@type=['\"][\w-]+['\"]\])?$")
+    
+    def __init__(self, caminho, logger=None):
+        self.caminho = caminho
+        self.logger = logger or logging.getLogger('ETL')
+        self.dados = self._carregar()
+        self.execucao = {}  # controle -> {"acertos", "erros"} só desta execução
+    
+    def _carregar(self):
+        if not os.path.exists(self.caminho):
+            return {}
+        try:
+            with open(self.caminho, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"⚠️  Cache de seletores ilegível, ignorando: {e}")
+            return {}
+    
+    def _entrada(self, controle):
+        return self.dados.setdefault(controle, {"seletor": None, "acertos": 0, "erros": 0, "rebaixamentos": 0})
+    
+    def _contar(self, controle, campo):
+        self._entrada(controle)[campo] += 1
+        if campo != "rebaixamentos":
+            estatistica = self.execucao.setdefault(controle, {"acertos": 0, "erros": 0})
+            estatistica[campo] += 1
+    
+    def ordenar(self, controle, seletores):
+        """Seletores com o último que funcionou na frente (se ainda estiver na lista)"""
+        preferido = self.dados.get(controle, {}).get("seletor")
+        if preferido in seletores and not self.GENERICO.match(preferido):
+            return [preferido] + [seletor for seletor in seletores if seletor != preferido]
+        return list(seletores)
+    
+    def registrar(self, controle, seletor):
+        """Seletor que funcionou: acerto se era o do cache; senão ele assume o lugar do antigo"""
+        entrada = self._entrada(controle)
+        if entrada["seletor"] == seletor:
+            self._contar(controle, "acertos")
+            return
+        if entrada["seletor"]:
+            # Só é erro quando havia um seletor em cache e ele não serviu (1ª execução não conta)
+            self._contar(controle, "erros")
+            self._contar(controle, "rebaixamentos")
+            self.logger.warning(f"⚠️  Seletor em cache de '{controle}' não funcionou mais - a página pode ter mudado")
+            entrada["seletor"] = None
+        if not self.GENERICO.match(seletor):
+            entrada["seletor"] = seletor
+            entrada["atualizado_em"] = datetime.now().isoformat(timespec="seconds")
+    
+    def falhou(self, controle):
+        """Nenhum seletor funcionou: o do cache é descartado"""
+        entrada = self._entrada(controle)
+        if entrada["seletor"]:
+            self._contar(controle, "erros")
+            self._contar(controle, "rebaixamentos")
+            entrada["seletor"] = None
+    
+    def salvar(self):
+        """Grava o cache de forma atômica (arquivo temporário + replace)"""
+        try:
+            os.makedirs(os.path.dirname(self.caminho), exist_ok=True)
+            temporario = self.caminho + ".tmp"
+            with open(temporario, "w", encoding="utf-8") as f:
+                json.dump(self.dados, f, ensure_ascii=False, indent=2)
+            os.replace(temporario, self.caminho)
+        except OSError as e:
+            self.logger.warning(f"⚠️  Não foi possível gravar o cache de seletores: {e}")
+    
+    def registrar_metricas(self):
+        """Loga acertos/erros do cache por controle nesta execução"""
+        if not self.execucao:
+            return
+        acertos = sum(e["acertos"] for e in self.execucao.values())
+        total = acertos + sum(e["erros"] for e in self.execucao.values())
+        detalhes = " | ".join(f"{controle} {e['acertos']}/{e['acertos'] + e['erros']}"
+                              for controle, e in self.execucao.items())
+        self.logger.info(f"🎯 Cache de seletores: {acertos}/{total} acertos ({detalhes})")
+
 # =============================================================================
 # WEB SCRAPING ESPECÍFICO UNIPIX COM 2FA - VERSÃO ATUALIZADA COM PLANILHA
 # =============================================================================
+# Sondagem de seletores no próprio navegador: uma chamada execute_async_script avalia a lista
+# inteira de XPaths a cada 100 ms até o prazo e devolve [elemento, índice do XPath] ou null
+JS_SONDAR_SELETORES = """
+var seletores = arguments[0], prazo = Date.now() + arguments[1] * 1000, clicavel = arguments[2];
+var pronto = arguments[arguments.length - 1];
+function visivel(el) {
+    var caixa = el.getBoundingClientRect(), estilo = window.getComputedStyle(el);
+    return caixa.width > 0 && caixa.height > 0 && estilo.visibility !== 'hidden' && estilo.display !== 'none';
+}
+function sondar() {
+    for (var i = 0; i < seletores.length; i++) {
+        var achados;
+        try {
+            achados = document.evaluate(seletores[i], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        } catch (e) {
+            continue;
+        }
+        for (var j = 0; j < achados.snapshotLength; j++) {
+            var el = achados.snapshotItem(j);
+            if (el.nodeType === 1 && visivel(el) && (!clicavel || !el.disabled)) {
+                pronto([el, i]);
+                return;
+            }
+        }
+    }
+    if (Date.now() >= prazo) {
+        pronto(null);
+        return;
+    }
+    setTimeout(sondar, 100);
+}
+sondar();
+"""
+
 class UnipixScraper:
     def __init__(self, config, download_folder):
         self.config = config
@@ -319,9 +590,19 @@ class UnipixScraper:
         self.logger = logging.getLogger('UnipixScraper')
         self.planilha_reader = PlanilhaCodeReader(config)
         self.gestor_arquivos = GestorArquivos(config)  # NOVO: Gestor de arquivos
+        self.cache_seletores = CacheSeletores(os.path.join(config.state_folder, "seletores.json"), self.logger)
+        self.tempos_login = {}
+        self._instante_submit = None
+        self._tela_login = None  # (URL, campo de senha) no momento do submit
+        self._timeout_script = 0  # Script timeout já configurado no driver
+        self._thread_navegador = None  # Preparo do navegador em segundo plano
+        self._login_pre_carregado = False
+        self._erro_navegador = None
+        self._tempo_preparo = 0.0
     
     def configurar_chrome(self):
         """Configura o Chrome para download automático"""
+        carregar_selenium()
         chrome_options = Options()
         
         # Configurações para download automático
@@ -341,8 +622,42 @@ class UnipixScraper:
         
         self.driver = webdriver.Chrome(options=chrome_options)
         self.wait = WebDriverWait(self.driver, 30)
+        self._timeout_script = 0
         self.logger.info("✅ Navegador Chrome configurado")
     
+    def _preparar_navegador(self):
+        """Abre o Chrome e já carrega a tela de login (roda em segundo plano enquanto o período é digitado)"""
+        try:
+            inicio = time.perf_counter()
+            self.configurar_chrome()
+            self.driver.get(LOGIN_URL)
+            self._login_pre_carregado = True
+            self._tempo_preparo = time.perf_counter() - inicio
+        except Exception as e:
+            self._erro_navegador = e
+    
+    def iniciar_navegador_em_segundo_plano(self):
+        """Dispara o preparo do navegador sem bloquear o prompt do período"""
+        self._login_pre_carregado = False
+        self._erro_navegador = None
+        self._thread_navegador = threading.Thread(target=self._preparar_navegador, name="navegador", daemon=True)
+        self._thread_navegador.start()
+    
+    def aguardar_navegador(self):
+        """Espera o preparo em segundo plano terminar; se ele falhou, abre o navegador agora"""
+        if self._thread_navegador:
+            inicio = time.perf_counter()
+            self._thread_navegador.join()
+            self._thread_navegador = None
+            espera = time.perf_counter() - inicio
+            if self._erro_navegador is None:
+                self.logger.info(f"⏱️  Navegador pré-carregado em {self._tempo_preparo:.1f}s "
+                                 f"(espera após o período: {espera:.1f}s)")
+                return
+            self.logger.warning(f"⚠️  Pré-carregamento do navegador falhou: {self._erro_navegador}")
+        if self.driver is None:
+            self.configurar_chrome()
+    
     def coletar_credenciais_usuario(self):
         """Coleta credenciais e período do usuário - AGORA SÓ PERGUNTA O PERÍODO"""
         print("\n" + "="*70)
@@ -375,18 +690,22 @@ class UnipixScraper:
         
         return credenciais
     
-    def obter_codigo_verificacao(self, tempo_espera=60):
-        """Obtém o código de verificação da planilha - AGORA COM ESPERA"""
+    def obter_codigo_verificacao(self, tempo_espera=LOGIN_TIMEOUT_2FA):
+        """Obtém o código de verificação assim que a planilha for regravada após o login"""
         try:
             self.logger.info("📊 Obtendo código da planilha...")
-            print(f"⏳ Aguardando {tempo_espera} segundos para planilha atualizar...")
-            
-            # ESPERA O TEMPO CONFIGURADO ANTES DE TENTAR LER
-            for i in range(tempo_espera // 10, 0, -1):
-                print(f"   🕒 {i * 10} segundos restantes...")
-                time.sleep(10)
+            print(f"⏳ Aguardando a planilha receber o novo código (até {tempo_espera}s)...")
+            
+            # Espera a gravação do código novo (mtime posterior ao envio do login)
+            inicio = time.perf_counter()
+            desde = self._instante_submit or time.time()
+            atualizada = self.planilha_reader.aguardar_atualizacao(desde, tempo_maximo=tempo_espera)
+            self._registrar_etapa_login("código 2FA na planilha", time.perf_counter() - inicio)
+            if not atualizada:
+                # O código que está na planilha é de um login anterior: não adianta enviá-lo
+                return None
             
-            self.logger.info("✅ Finalizou espera, lendo planilha...")
+            self.logger.info("✅ Lendo planilha...")
             
             codigo = self.planilha_reader.ler_codigo_da_planilha()
             
@@ -406,10 +725,7 @@ class UnipixScraper:
         try:
             print("\n📱 AUTENTICAÇÃO VIA PLANILHA EXCEL")
             print("="*50)
-            print("⏳ Aguardando planilha ser atualizada (pode levar até 1 minuto)...")
-            
-            # DA MAIS TEMPO PARA A PLANILHA ATUALIZAR
-            time.sleep(60)
+            print("⏳ Aguardando planilha ser atualizada...")
             
             # Obtém código da planilha
             codigo_2fa = self.obter_codigo_verificacao()
@@ -458,13 +774,8 @@ class UnipixScraper:
                 "//input[@type='text']"
             ]
             
-            campo_codigo = None
-            for seletor in seletores_codigo:
-                try:
-                    campo_codigo = self.driver.find_element(By.XPATH, seletor)
-                    break
-                except:
-                    continue
+            campo_codigo = self._aguardar_seletor("campo código 2FA", seletores_codigo,
+                                                  LOGIN_TIMEOUT, "campo do código 2FA")
             
             if not campo_codigo:
                 print("❌ Campo do código de autenticação não encontrado")
@@ -483,24 +794,19 @@ class UnipixScraper:
                 "//button[contains(text(), 'Enviar')]"
             ]
             
-            botao_verificar = None
-            for seletor in seletores_verificar:
-                try:
-                    botao_verificar = self.driver.find_element(By.XPATH, seletor)
-                    botao_verificar.click()
-                    break
-                except:
-                    continue
+            botao_verificar, _ = self._sondar_seletores(seletores_verificar, 0)
             
             if not botao_verificar:
                 print("❌ Botão de verificação não encontrado")
                 return False
             
+            botao_verificar.click()
+            
             self.logger.info("✅ Botão de verificação clicado")
             print("⏳ Verificando código...")
             
-            # Aguarda a verificação
-            time.sleep(8)
+            # Aguarda sair da tela de autenticação
+            self._aguardar_condicao(lambda driver: self._fora_da_tela_login(), LOGIN_TIMEOUT, "verificação do código")
             
             return self._verificar_login_sucesso()
             
@@ -508,18 +814,129 @@ class UnipixScraper:
             self.logger.error(f"❌ Erro ao preencher código: {e}")
             return False
     
+    def _aguardar_condicao(self, condicao, timeout, etapa):
+        """Espera explícita (WebDriverWait) com timeout; registra a duração da etapa - None se estourar"""
+        inicio = time.perf_counter()
+        try:
+            resultado = WebDriverWait(self.driver, timeout, poll_frequency=0.25).until(condicao)
+        except TimeoutException:
+            self.logger.warning(f"⚠️  Timeout de {timeout}s aguardando: {etapa}")
+            resultado = None
+        self._registrar_etapa_login(etapa, time.perf_counter() - inicio)
+        return resultado
+    
+    def _registrar_etapa_login(self, etapa, duracao):
+        self.tempos_login[etapa] = self.tempos_login.get(etapa, 0.0) + duracao
+        self.logger.info(f"⏱️  {etapa}: {duracao:.1f}s")
+    
+    def _resumo_tempos_login(self):
+        """Loga o tempo de cada etapa do login e o total"""
+        if self.tempos_login:
+            etapas = " | ".join(f"{etapa} {duracao:.1f}s" for etapa, duracao in self.tempos_login.items())
+            self.logger.info(f"⏱️  Login: {etapas} | total {sum(self.tempos_login.values()):.1f}s")
+    
+    def _sondar_seletores(self, seletores, timeout, clicavel=True):
+        """Procura os XPaths em uma única chamada ao navegador, reavaliando a lista até o prazo
+        
+        Devolve (elemento, índice do XPath) do primeiro visível - e habilitado, se clicavel -
+        ou (None, None). timeout=0 faz uma única checagem.
+        """
+        if self._timeout_script < timeout + 5:
+            self._timeout_script = timeout + 5
+            self.driver.set_script_timeout(self._timeout_script)
+        prazo = time.monotonic() + timeout
+        while True:
+            restante = max(prazo - time.monotonic(), 0)
+            try:
+                resultado = self.driver.execute_async_script(JS_SONDAR_SELETORES, list(seletores), restante, clicavel)
+            except WebDriverException as e:
+                # Navegação no meio da sondagem ("document unloaded" etc.) interrompe o script:
+                # sonda de novo na página nova enquanto houver prazo
+                if time.monotonic() >= prazo:
+                    self.logger.warning(f"⚠️  Sondagem de seletores falhou: {e}")
+                    return None, None
+                time.sleep(0.1)
+                continue
+            return (resultado[0], int(resultado[1])) if resultado else (None, None)
+    
+    def _usar_seletor(self, controle, seletores, acao=None, timeout=SELETOR_TIMEOUT, clicavel=True):
+        """Encontra o controle numa única sondagem no navegador, com o XPath do cache na frente
+        
+        Se acao(elemento) falhar, o XPath usado sai da lista e a sondagem repete com os
+        restantes por até SELETOR_TIMEOUT_FALLBACK segundos.
+        """
+        ordem = self.cache_seletores.ordenar(controle, seletores)
+        espera = timeout
+        while ordem:
+            elemento, indice = self._sondar_seletores(ordem, espera, clicavel)
+            if elemento is None:
+                break
+            seletor = ordem.pop(indice)
+            try:
+                if acao:
+                    acao(elemento)
+            except Exception:
+                self.logger.info(f"❌ Seletor de '{controle}' falhou: {seletor}")
+                espera = min(timeout, SELETOR_TIMEOUT_FALLBACK)
+                continue
+            self.cache_seletores.registrar(controle, seletor)
+            return elemento
+        self.cache_seletores.falhou(controle)
+        return None
+    
+    def _aguardar_seletor(self, controle, seletores, timeout, etapa):
+        """Espera o primeiro XPath visível (sondagem no navegador, na ordem do cache); registra a duração da etapa"""
+        inicio = time.perf_counter()
+        ordem = self.cache_seletores.ordenar(controle, seletores)
+        elemento, indice = self._sondar_seletores(ordem, timeout, clicavel=False)
+        self._registrar_etapa_login(etapa, time.perf_counter() - inicio)
+        if elemento is None:
+            self.logger.warning(f"⚠️  Timeout de {timeout}s aguardando: {etapa}")
+            self.cache_seletores.falhou(controle)
+            return None
+        self.cache_seletores.registrar(controle, ordem[indice])
+        return elemento
+    
+    def _fora_da_tela_login(self):
+        url = self.driver.current_url.lower()
+        return "login" not in url and "auth" not in url
+    
+    def _saiu_do_formulario_login(self):
+        """True quando a URL mudou desde o submit ou o campo de senha sumiu da página"""
+        if self._tela_login is None:
+            return True
+        url, campo_senha = self._tela_login
+        if self.driver.current_url != url:
+            return True
+        try:
+            return not campo_senha.is_displayed()
+        except StaleElementReferenceException:
+            # O formulário foi removido do DOM
+            return True
+    
+    def _estado_pos_login(self, driver):
+        """Condição após o submit: "2fa" se a página pediu código, "logado" se saiu da tela de login"""
+        # Os indicadores de 2FA ("código", "autenticação"...) também casam com a própria tela de login
+        if not self._saiu_do_formulario_login():
+            return False
+        if self._verificar_se_precisa_2fa():
+            return "2fa"
+        if self._fora_da_tela_login():
+            return "logado"
+        return False
+    
     def fazer_login_unipix(self, usuario, senha):
         """Faz login no site da Unipix com suporte a 2FA - ATUALIZADO"""
         try:
             self.logger.info("🔐 Fazendo login na Unipix...")
             print("🔐 Realizando login...")
             
-            # Acessa a página de login
-            self.driver.get("https://avia.unipix.com.br/#/login")
-            time.sleep(5)
+            self.tempos_login = {}
             
-            # Aguarda a página carregar
-            self.wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+            # Acessa a página de login (se não veio pré-carregada durante o prompt)
+            if not self._login_pre_carregado:
+                self.driver.get(LOGIN_URL)
+            self._login_pre_carregado = False
             
             # Tenta encontrar e preencher o campo de usuário
             seletores_usuario = [
@@ -530,13 +947,9 @@ class UnipixScraper:
                 "//input[@type='email']"
             ]
             
-            campo_usuario = None
-            for seletor in seletores_usuario:
-                try:
-                    campo_usuario = self.driver.find_element(By.XPATH, seletor)
-                    break
-                except:
-                    continue
+            # Aguarda o campo de usuário ser renderizado (em vez de espera fixa)
+            campo_usuario = self._aguardar_seletor("campo usuário", seletores_usuario,
+                                                   LOGIN_TIMEOUT, "tela de login")
             
             if not campo_usuario:
                 self.logger.error("❌ Campo de usuário não encontrado")
@@ -554,13 +967,7 @@ class UnipixScraper:
                 "//input[@type='password']"
             ]
             
-            campo_senha = None
-            for seletor in seletores_senha:
-                try:
-                    campo_senha = self.driver.find_element(By.XPATH, seletor)
-                    break
-                except:
-                    continue
+            campo_senha, _ = self._sondar_seletores(seletores_senha, 0, clicavel=False)
             
             if not campo_senha:
                 self.logger.error("❌ Campo de senha não encontrado")
@@ -578,32 +985,29 @@ class UnipixScraper:
                 "//input[@type='submit']"
             ]
             
-            botao_login = None
-            for seletor in seletores_botao:
-                try:
-                    botao_login = self.driver.find_element(By.XPATH, seletor)
-                    break
-                except:
-                    continue
+            # A tela já carregou: uma única checagem, sem espera
+            botao_login = self._usar_seletor("botão login", seletores_botao, timeout=0)
             
             if not botao_login:
                 self.logger.error("❌ Botão de login não encontrado")
                 return False
             
+            self._tela_login = (self.driver.current_url, campo_senha)
             botao_login.click()
+            self._instante_submit = time.time()
             self.logger.info("✅ Botão de login clicado")
             
-            # Aguarda o processamento do login
-            time.sleep(5)
+            # Aguarda a página pedir o 2FA ou sair da tela de login
+            estado = self._aguardar_condicao(self._estado_pos_login, LOGIN_TIMEOUT, "resposta do login")
             
-            # Verifica se precisa de autenticação de dois fatores
-            if self._verificar_se_precisa_2fa():
+            if estado == "2fa":
                 # AGORA USA A PLANILHA SE CONFIGURADO
-                return self._processar_autenticacao_2fa_automatica()
+                sucesso = self._processar_autenticacao_2fa_automatica()
             else:
                 # Login sem 2FA
-                time.sleep(5)
-                return self._verificar_login_sucesso()
+                sucesso = self._verificar_login_sucesso()
+            self._resumo_tempos_login()
+            return sucesso
                 
         except Exception as e:
             self.logger.error(f"❌ Erro no login: {e}")
@@ -624,15 +1028,12 @@ class UnipixScraper:
                 "//input[@type='number']"
             ]
             
-            for indicador in indicadores_2fa:
-                try:
-                    elemento = self.driver.find_element(By.XPATH, indicador)
-                    if elemento.is_displayed():
-                        self.logger.info("🔐 Autenticação de dois fatores detectada")
-                        print("🔐 Autenticação de dois fatores necessária")
-                        return True
-                except:
-                    continue
+            # Uma sondagem só para todos os indicadores (roda a cada poll da espera pós-login)
+            elemento, _ = self._sondar_seletores(indicadores_2fa, 0, clicavel=False)
+            if elemento:
+                self.logger.info("🔐 Autenticação de dois fatores detectada")
+                print("🔐 Autenticação de dois fatores necessária")
+                return True
             
             return False
             
@@ -707,46 +1108,21 @@ class UnipixScraper:
                 "//button[contains(@class, 'filter')]",
             ]
             
-            botao_filtros = None
-            seletor_usado = None
-            
-            for i, seletor in enumerate(seletores_filtro_avancado, 1):
+            def abrir_filtros(botao):
+                # Rolando para o elemento ser visível
+                self.driver.execute_script("arguments[0].scrollIntoView(true);", botao)
+                time.sleep(1)
+                
+                # Tenta clicar via JavaScript se o clique normal falhar
                 try:
-                    # LOG DIFERENCIADO PARA O SELETOR PREFERENCIAL
-                    if i == 1:
-                        self.logger.info(f"🎯 Tentando seletor PREFERENCIAL: {seletor}")
-                        print("🎯 Usando seletor preferencial...")
-                    else:
-                        self.logger.info(f"🔍 Tentando seletor fallback {i}: {seletor}")
-                    
-                    botao_filtros = self.wait.until(
-                        EC.element_to_be_clickable((By.XPATH, seletor))
-                    )
-                    
-                    # Rolando para o elemento ser visível
-                    self.driver.execute_script("arguments[0].scrollIntoView(true);", botao_filtros)
-                    time.sleep(1)
-                    
-                    # Tenta clicar via JavaScript se o clique normal falhar
-                    try:
-                        botao_filtros.click()
-                    except:
-                        self.driver.execute_script("arguments[0].click();", botao_filtros)
-                    
-                    seletor_usado = seletor
-                    if i == 1:
-                        self.logger.info("✅ Seletor PREFERENCIAL funcionou!")
-                        print("✅ Filtros avançados abertos com sucesso!")
-                    else:
-                        self.logger.info(f"✅ Seletor fallback {i} funcionou: {seletor}")
-                    break
-                    
-                except Exception as e:
-                    if i == 1:
-                        self.logger.warning(f"⚠️  Seletor preferencial falhou, tentando fallbacks...")
-                    else:
-                        self.logger.info(f"❌ Seletor {i} falhou: {e}")
-                    continue
+                    botao.click()
+                except:
+                    self.driver.execute_script("arguments[0].click();", botao)
+            
+            # O cache de seletores coloca na frente o XPath que funcionou na última execução
+            botao_filtros = self._usar_seletor("filtros avançados", seletores_filtro_avancado, abrir_filtros)
+            if botao_filtros:
+                print("✅ Filtros avançados abertos com sucesso!")
             
             if not botao_filtros:
                 self.logger.error("❌ Botão 'Filtros avançados' não encontrado")
@@ -775,19 +1151,11 @@ class UnipixScraper:
                 "//input[contains(@class, 'ng-pristine') and contains(@placeholder, 'Data')]",
             ]
             
-            input_data = None
-            for seletor in seletores_data_envio:
-                try:
-                    input_data = self.wait.until(
-                        EC.element_to_be_clickable((By.XPATH, seletor))
-                    )
-                    input_data.click()
-                    self.logger.info("✅ Input 'Data de envio' clicado")
-                    break
-                except:
-                    continue
+            input_data = self._usar_seletor("data de envio", seletores_data_envio, lambda campo: campo.click())
             
-            if not input_data:
+            if input_data:
+                self.logger.info("✅ Input 'Data de envio' clicado")
+            else:
                 self.logger.error("❌ Input 'Data de envio' não encontrado")
                 return False
             
@@ -904,15 +1272,10 @@ class UnipixScraper:
                 "//button[text()='Confirmar']",
             ]
 
-            for seletor in seletores_confirmar:
-                try:
-                    botao_confirmar = self.driver.find_element(By.XPATH, seletor)
-                    if botao_confirmar.is_displayed():
-                        self.driver.execute_script("arguments[0].click();", botao_confirmar)
-                        self.logger.info("✅ Data confirmada")
-                        break
-                except:
-                    continue
+            botao_confirmar, _ = self._sondar_seletores(seletores_confirmar, 0, clicavel=False)
+            if botao_confirmar:
+                self.driver.execute_script("arguments[0].click();", botao_confirmar)
+                self.logger.info("✅ Data confirmada")
 
             time.sleep(2)
 
@@ -923,19 +1286,12 @@ class UnipixScraper:
                 "//button[contains(text(), 'Aplicar Filtros')]",
             ]
             
-            botao_aplicar = None
-            for seletor in seletores_aplicar_filtros:
-                try:
-                    botao_aplicar = self.wait.until(
-                        EC.element_to_be_clickable((By.XPATH, seletor))
-                    )
-                    self.driver.execute_script("arguments[0].click();", botao_aplicar)
-                    self.logger.info("✅ Filtros aplicados")
-                    break
-                except:
-                    continue
+            botao_aplicar = self._usar_seletor("aplicar filtros", seletores_aplicar_filtros,
+                                               lambda botao: self.driver.execute_script("arguments[0].click();", botao))
             
-            if not botao_aplicar:
+            if botao_aplicar:
+                self.logger.info("✅ Filtros aplicados")
+            else:
                 self.logger.error("❌ Botão 'Aplicar Filtros' não encontrado")
                 return False
             
@@ -964,24 +1320,20 @@ class UnipixScraper:
                 "//button[.//span[contains(text(), 'Baixar planilha')]]"
             ]
             
-            botao_baixar = None
-            for seletor in seletores_baixar:
-                try:
-                    botao_baixar = self.wait.until(
-                        EC.element_to_be_clickable((By.XPATH, seletor))
-                    )
-                    botao_baixar.click()
-                    self.logger.info("✅ Botão 'Baixar planilha' clicado")
-                    break
-                except:
-                    continue
+            botao_baixar = self._usar_seletor("baixar planilha", seletores_baixar, lambda botao: botao.click())
             
-            if not botao_baixar:
+            if botao_baixar:
+                self.logger.info("✅ Botão 'Baixar planilha' clicado")
+            else:
                 self.logger.error("❌ Botão 'Baixar planilha' não encontrado")
                 return None
             
             time.sleep(3)
             
+            # Estado da pasta antes do download: só o arquivo novo conta
+            monitor = MonitorDownload(self.download_folder, logger=self.logger)
+            monitor.capturar()
+            
             # 2. SELECIONAR FORMATO CSV
             seletores_csv = [
                 "//button[contains(@class, 'button-') and contains(text(), 'CSV')]",
@@ -989,48 +1341,26 @@ class UnipixScraper:
                 "//button[contains(text(), 'CSV') and contains(@class, 'ng-star-inserted')]"
             ]
             
-            botao_csv = None
-            for seletor in seletores_csv:
-                try:
-                    botao_csv = self.wait.until(
-                        EC.element_to_be_clickable((By.XPATH, seletor))
-                    )
-                    botao_csv.click()
-                    self.logger.info("✅ Opção 'CSV' selecionada")
-                    break
-                except:
-                    continue
+            botao_csv = self._usar_seletor("formato CSV", seletores_csv, lambda botao: botao.click())
             
-            if not botao_csv:
+            if botao_csv:
+                self.logger.info("✅ Opção 'CSV' selecionada")
+            else:
                 self.logger.error("❌ Botão 'CSV' não encontrado")
                 return None
             
-            # 3. AGUARDAR DOWNLOAD - VERSÃO SIMPLIFICADA SEM LOOP
+            # 3. AGUARDAR O ARQUIVO NOVO TERMINAR DE BAIXAR
             self.logger.info("⏳ Aguardando conclusão do download...")
-            print("⏳ Aguardando conclusão do download (100 segundos)...")
+            print("⏳ Aguardando conclusão do download...")
             
-            # Espera fixa suficiente para o download - SEM LOOP COMPLEXO
-            time.sleep(100)
+            arquivo_baixado = monitor.aguardar()
             
-            # Procura por qualquer arquivo ZIP/CSV na pasta de download
-            arquivos_download = []
-            for arquivo in os.listdir(self.download_folder):
-                if arquivo.lower().endswith(('.zip', '.csv', '.xlsx', '.xls')):
-                    caminho_completo = os.path.join(self.download_folder, arquivo)
-                    arquivos_download.append(caminho_completo)
-            
-            if arquivos_download:
-                # Pega o primeiro arquivo encontrado (ou poderia pegar o mais recente)
-                arquivo_baixado = arquivos_download[0]
+            if arquivo_baixado:
                 nome_arquivo = os.path.basename(arquivo_baixado)
-                
-                self.logger.info(f"✅ Arquivo encontrado: {nome_arquivo}")
                 print(f"✅ Download detectado: {nome_arquivo}")
                 return arquivo_baixado
             else:
-                # Se não encontrou arquivos, apenas continua o processo
-                self.logger.info("⚠️  Nenhum arquivo de download encontrado, mas continuando processo")
-                print("⚠️  Nenhum arquivo detectado, mas continuando processo...")
+                print("❌ Download não concluído")
                 return None
                 
         except Exception as e:
@@ -1051,15 +1381,16 @@ class UnipixScraper:
             print("📁 Download para: " + DOWNLOAD_FOLDER)
             print("💡 Informe apenas o período quando solicitado")
             
+            # 0. Abre o navegador e a tela de login enquanto o período é digitado
+            self.iniciar_navegador_em_segundo_plano()
+            
             # 1. Coletar credenciais (agora automático, só pede período)
             credenciais = self.coletar_credenciais_usuario()
             if not credenciais:
                 return 0
-        
-        
             
-            # 2. Configurar navegador
-            self.configurar_chrome()
+            # 2. Navegador (normalmente já pronto com a tela de login carregada)
+            self.aguardar_navegador()
             
             # 3. Fazer login (agora com suporte a 2FA via planilha)
             if not self.fazer_login_unipix(credenciais['usuario'], credenciais['senha']):
@@ -1090,6 +1421,14 @@ class UnipixScraper:
             print(f"💥 Erro na rotina: {e}")
             return 0
         finally:
+            self.cache_seletores.registrar_metricas()
+            self.cache_seletores.salvar()
+            
+            # Um preparo ainda em andamento (ex.: período inválido) termina antes do quit
+            if self._thread_navegador:
+                self._thread_navegador.join()
+                self._thread_navegador = None
+            
             # Fecha o navegador
             if self.driver:
                 self.driver.quit()
@@ -1562,6 +1901,7 @@ def executar_web_scraping_unipix(config):
 def main():
     try:
         config = Config()
+        config.logger.info(f"⏱️  Imports do módulo em {TEMPO_IMPORTS * 1000:.0f} ms")
         database = DatabaseSimulado(config.logger)
         etl = ProcessadorETL(config, database)
         
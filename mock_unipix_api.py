@@ -0,0 +1,307 @@
+# mock_unipix_api.py - SERVIDOR LOCAL QUE IMITA A API RELATORIO-ANALITICO DA UNIPIX
+import json
+import base64
+import uuid
+import math
+import random
+import threading
+import time
+import argparse
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# =============================================================================
+# CONFIGURAÇÕES PADRÃO
+# =============================================================================
+MOCK_HOST = "127.0.0.1"
+MOCK_PORTA = 8765
+MOCK_CAMINHO = "/relatorio-analitico"
+MOCK_REGISTROS = 100000  # Tamanho do conjunto de dados simulado
+MOCK_INICIO = "2024-01-01T00:00:00.000Z"  # Primeiro envio simulado
+MOCK_FIM = "2024-01-31T23:59:59.000Z"  # Último envio simulado
+MOCK_LATENCIA = 0.05  # Latência base por requisição (segundos)
+MOCK_LATENCIA_POR_REGISTRO = 0.00002  # Latência adicional por registro devolvido (segundos)
+MOCK_JITTER = 0.02  # Variação aleatória somada à latência (segundos)
+MOCK_TAXA_ERRO = 0.0  # Fração de requisições respondidas com 503
+MOCK_TAXA_429 = 0.0  # Fração de requisições respondidas com 429 + Retry-After
+MOCK_EXIGIR_TOKEN = False  # Responde 401 sem header Authorization
+MOCK_CAMINHO_LOGIN = "/auth/login"  # POST usuário/senha (mesmo caminho de AUTH_URL)
+MOCK_CAMINHO_2FA = "/auth/2fa"  # POST do código de verificação (mesmo caminho de AUTH_2FA_URL)
+MOCK_USUARIO = None  # Usuário aceito no login (None = qualquer um)
+MOCK_SENHA = None  # Senha aceita no login (None = qualquer uma)
+MOCK_CODIGO_2FA = None  # Código exigido após o login (None = login sem 2FA)
+MOCK_VALIDADE_TOKEN = 3600  # exp dos JWT emitidos (segundos)
+
+STATUS_SIMULADOS = ["ENTREGUE", "ENVIADO", "NAO_ENTREGUE", "EXPIRADO", "REJEITADO"]
+CAMPANHAS_SIMULADAS = ["COBRANCA", "BOAS_VINDAS", "PROMOCAO", "LEMBRETE"]
+
+def iso_para_datetime(iso: str) -> datetime:
+    """Converte AAAA-MM-DDTHH:MM:SS.mmmZ para datetime (sem fuso)"""
+    return datetime.strptime(iso, "%Y-%m-%dT%H:%M:%S.%fZ")
+
+def datetime_para_iso(dt: datetime) -> str:
+    """Converte datetime para o formato ISO com milissegundos usado pela API"""
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.") + f"{dt.microsecond // 1000:03d}Z"
+
+def jwt_simulado(usuario, validade=MOCK_VALIDADE_TOKEN):
+    """JWT sem assinatura válida, mas com o claim exp que o cliente lê"""
+    def parte(dados):
+        return base64.urlsafe_b64encode(json.dumps(dados).encode("utf-8")).rstrip(b"=").decode("ascii")
+    return ".".join([parte({"alg": "none", "typ": "JWT"}),
+                     parte({"sub": usuario, "exp": int(time.time()) + validade}), "mock"])
+
+# =============================================================================
+# CONJUNTO DE DADOS SIMULADO
+# =============================================================================
+class DatasetSimulado:
+    """Registros gerados sob demanda, com envios espaçados uniformemente no período
+
+    Nada fica em memória: o registro i é sempre o mesmo e as faixas de data viram
+    faixas de índice, então o mock aguenta milhões de registros.
+    """
+    def __init__(self, total=MOCK_REGISTROS, inicio_iso=MOCK_INICIO, fim_iso=MOCK_FIM):
+        self.total = total
+        self.inicio = iso_para_datetime(inicio_iso)
+        self.fim = iso_para_datetime(fim_iso)
+        self.passo = (self.fim - self.inicio) / max(total, 1)
+
+    def _instante(self, indice):
+        return self.inicio + self.passo * (indice + 0.5)
+
+    def faixa(self, inicio_iso=None, fim_iso=None):
+        """Índices [primeiro, último) dos registros enviados dentro de [inicio, fim]"""
+        if self.total == 0 or self.passo <= timedelta(0):
+            return 0, 0
+        primeiro, ultimo = 0, self.total
+        if inicio_iso:
+            deslocamento = (iso_para_datetime(inicio_iso) - self.inicio) / self.passo - 0.5
+            primeiro = min(max(math.ceil(deslocamento), 0), self.total)
+        if fim_iso:
+            deslocamento = (iso_para_datetime(fim_iso) - self.inicio) / self.passo - 0.5
+            ultimo = min(max(math.floor(deslocamento) + 1, 0), self.total)
+        return primeiro, max(primeiro, ultimo)
+
+    def registro(self, indice):
+        """Monta o registro i (determinístico)"""
+        envio = self._instante(indice)
+        return {
+            "id": indice + 1,
+            "campanha": CAMPANHAS_SIMULADAS[indice % len(CAMPANHAS_SIMULADAS)],
+            "contato": f"55119{indice % 100000000:08d}",
+            "mensagem": f"Mensagem simulada {indice + 1}",
+            "status": STATUS_SIMULADOS[indice % len(STATUS_SIMULADOS)],
+            "tarifado": indice % 3 != 0,
+            "centroCusto": f"CC{indice % 10:02d}",
+            "dataEnvio": datetime_para_iso(envio),
+            "dataStatus": datetime_para_iso(envio + timedelta(seconds=30 + indice % 600))
+        }
+
+# =============================================================================
+# SERVIDOR HTTP
+# =============================================================================
+class ManipuladorMock(BaseHTTPRequestHandler):
+    """Responde GET no caminho do relatório no mesmo formato paginado da API real"""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, formato, *args):
+        # Silencioso: o benchmark mede o cliente, não o log do servidor
+        pass
+
+    def _responder(self, status, corpo, headers=None):
+        dados = json.dumps(corpo, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json;charset=UTF-8")
+        self.send_header("Content-Length", str(len(dados)))
+        for nome, valor in (headers or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _ler_json(self):
+        tamanho = int(self.headers.get("Content-Length") or 0)
+        try:
+            corpo = json.loads(self.rfile.read(tamanho) or b"{}")
+        except ValueError:
+            return None
+        return corpo if isinstance(corpo, dict) else None
+
+    def _emitir_sessao(self, usuario):
+        """Responde com o JWT no corpo e um cookie de sessão, como o endpoint real"""
+        cookie = f"SESSION={uuid.uuid4().hex}; Path=/; HttpOnly"
+        self._responder(200, {"token": jwt_simulado(usuario, self.server.config["validade_token"])},
+                        {"Set-Cookie": cookie})
+
+    def do_POST(self):
+        cfg = self.server.config
+        caminho = urlparse(self.path).path
+        if caminho not in (cfg["caminho_login"], cfg["caminho_2fa"]):
+            self._responder(404, {"error": "Not Found", "path": caminho})
+            return
+        corpo = self._ler_json()
+        if corpo is None:
+            self._responder(400, {"error": "Bad Request", "message": "corpo JSON inválido"})
+            return
+
+        time.sleep(cfg["latencia"])
+        with self.server.lock:
+            self.server.logins += 1
+
+        if caminho == cfg["caminho_login"]:
+            usuario = corpo.get("username")
+            if not usuario or (cfg["usuario"] is not None and usuario != cfg["usuario"]) \
+                    or (cfg["senha"] is not None and corpo.get("password") != cfg["senha"]):
+                self._responder(401, {"error": "Unauthorized", "message": "usuário ou senha inválidos"})
+                return
+            if cfg["codigo_2fa"] is None:
+                self._emitir_sessao(usuario)
+                return
+            desafio = uuid.uuid4().hex
+            with self.server.lock:
+                self.server.desafios[desafio] = usuario
+            if cfg["planilha_2fa"]:
+                # Simula a automação que grava o SMS recebido na planilha de 2FA
+                with open(cfg["planilha_2fa"], "w", encoding="utf-8") as f:
+                    f.write(f"{cfg['codigo_2fa']}\n")
+            self._responder(200, {"requires2fa": True, "challengeId": desafio})
+            return
+
+        with self.server.lock:
+            usuario = self.server.desafios.get(corpo.get("challengeId"))
+        if not usuario or str(corpo.get("code", "")).strip() != str(cfg["codigo_2fa"]):
+            self._responder(401, {"error": "Unauthorized", "message": "código inválido"})
+            return
+        with self.server.lock:
+            self.server.desafios.pop(corpo.get("challengeId"), None)
+        self._emitir_sessao(usuario)
+
+    def do_GET(self):
+        cfg = self.server.config
+        url = urlparse(self.path)
+        if url.path != cfg["caminho"]:
+            self._responder(404, {"error": "Not Found", "path": url.path})
+            return
+
+        if cfg["exigir_token"] and not self.headers.get("Authorization"):
+            self._responder(401, {"error": "Unauthorized"})
+            return
+
+        sorteio = random.random()
+        if sorteio < cfg["taxa_429"]:
+            self._responder(429, {"error": "Too Many Requests"}, {"Retry-After": "1"})
+            return
+        if sorteio < cfg["taxa_429"] + cfg["taxa_erro"]:
+            self._responder(503, {"error": "Service Unavailable"})
+            return
+
+        params = {chave: valores[0] for chave, valores in parse_qs(url.query).items()}
+        try:
+            page = int(params.get("page", 0))
+            size = int(params.get("size", 20))
+            if page < 0 or size <= 0:
+                raise ValueError("page/size inválidos")
+            primeiro, ultimo = self.server.dataset.faixa(params.get("dataInicialEnvio"), params.get("dataFinalEnvio"))
+        except ValueError as e:
+            self._responder(400, {"error": "Bad Request", "message": str(e)})
+            return
+
+        total_elements = ultimo - primeiro
+        total_pages = math.ceil(total_elements / size)
+        inicio_pagina = primeiro + page * size
+        fim_pagina = min(inicio_pagina + size, ultimo)
+        content = [self.server.dataset.registro(i) for i in range(inicio_pagina, fim_pagina)]
+
+        time.sleep(cfg["latencia"] + cfg["latencia_por_registro"] * len(content) + random.uniform(0, cfg["jitter"]))
+
+        with self.server.lock:
+            self.server.requisicoes += 1
+
+        self._responder(200, {
+            "content": content,
+            "number": page,
+            "size": size,
+            "numberOfElements": len(content),
+            "totalElements": total_elements,
+            "totalPages": total_pages,
+            "first": page == 0,
+            "last": page + 1 >= total_pages
+        })
+
+def criar_servidor(host=MOCK_HOST, porta=MOCK_PORTA, registros=MOCK_REGISTROS, inicio_iso=MOCK_INICIO,
+                   fim_iso=MOCK_FIM, latencia=MOCK_LATENCIA, latencia_por_registro=MOCK_LATENCIA_POR_REGISTRO,
+                   jitter=MOCK_JITTER, taxa_erro=MOCK_TAXA_ERRO, taxa_429=MOCK_TAXA_429,
+                   exigir_token=MOCK_EXIGIR_TOKEN, caminho=MOCK_CAMINHO, usuario=MOCK_USUARIO, senha=MOCK_SENHA,
+                   codigo_2fa=MOCK_CODIGO_2FA, planilha_2fa=None, validade_token=MOCK_VALIDADE_TOKEN):
+    """Cria o servidor (porta 0 = porta livre qualquer) sem iniciá-lo"""
+    servidor = ThreadingHTTPServer((host, porta), ManipuladorMock)
+    servidor.daemon_threads = True
+    servidor.dataset = DatasetSimulado(registros, inicio_iso, fim_iso)
+    servidor.lock = threading.Lock()
+    servidor.requisicoes = 0
+    servidor.logins = 0
+    servidor.desafios = {}  # challengeId -> usuário aguardando o código 2FA
+    servidor.config = {
+        "caminho": caminho,
+        "latencia": latencia,
+        "latencia_por_registro": latencia_por_registro,
+        "jitter": jitter,
+        "taxa_erro": taxa_erro,
+        "taxa_429": taxa_429,
+        "exigir_token": exigir_token,
+        "caminho_login": MOCK_CAMINHO_LOGIN,
+        "caminho_2fa": MOCK_CAMINHO_2FA,
+        "usuario": usuario,
+        "senha": senha,
+        "codigo_2fa": codigo_2fa,
+        "planilha_2fa": planilha_2fa,
+        "validade_token": validade_token
+    }
+    return servidor
+
+def iniciar_em_thread(**kwargs):
+    """Sobe o servidor numa thread daemon e devolve (servidor, url do relatório)"""
+    kwargs.setdefault("porta", 0)
+    servidor = criar_servidor(**kwargs)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    host, porta = servidor.server_address[:2]
+    return servidor, f"http://{host}:{porta}{servidor.config['caminho']}"
+
+# =============================================================================
+# EXECUÇÃO
+# =============================================================================
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local que imita a API relatorio-analitico da Unipix")
+    parser.add_argument("--host", default=MOCK_HOST)
+    parser.add_argument("--porta", type=int, default=MOCK_PORTA)
+    parser.add_argument("--registros", type=int, default=MOCK_REGISTROS, help="tamanho do conjunto de dados")
+    parser.add_argument("--inicio", default=MOCK_INICIO, help="primeiro envio (AAAA-MM-DDTHH:MM:SS.mmmZ)")
+    parser.add_argument("--fim", default=MOCK_FIM, help="último envio (AAAA-MM-DDTHH:MM:SS.mmmZ)")
+    parser.add_argument("--latencia", type=float, default=MOCK_LATENCIA, help="latência base em segundos")
+    parser.add_argument("--latencia-por-registro", type=float, default=MOCK_LATENCIA_POR_REGISTRO)
+    parser.add_argument("--jitter", type=float, default=MOCK_JITTER)
+    parser.add_argument("--taxa-erro", type=float, default=MOCK_TAXA_ERRO, help="fração de respostas 503")
+    parser.add_argument("--taxa-429", type=float, default=MOCK_TAXA_429, help="fração de respostas 429")
+    parser.add_argument("--exigir-token", action="store_true", help="responde 401 sem Authorization")
+    parser.add_argument("--usuario", default=MOCK_USUARIO, help="usuário aceito no login (padrão: qualquer)")
+    parser.add_argument("--senha", default=MOCK_SENHA, help="senha aceita no login (padrão: qualquer)")
+    parser.add_argument("--codigo-2fa", default=MOCK_CODIGO_2FA, help="exige este código após o login")
+    parser.add_argument("--planilha-2fa", help="CSV onde o código é gravado a cada login (simula o SMS)")
+    args = parser.parse_args()
+
+    servidor = criar_servidor(args.host, args.porta, args.registros, args.inicio, args.fim, args.latencia,
+                              args.latencia_por_registro, args.jitter, args.taxa_erro, args.taxa_429,
+                              args.exigir_token, usuario=args.usuario, senha=args.senha,
+                              codigo_2fa=args.codigo_2fa, planilha_2fa=args.planilha_2fa)
+    host, porta = servidor.server_address[:2]
+    print(f"🧪 Mock da API Unipix em http://{host}:{porta}{MOCK_CAMINHO} ({args.registros} registros)")
+    print(f"   Login sem navegador em http://{host}:{porta}{MOCK_CAMINHO_LOGIN} e {MOCK_CAMINHO_2FA}")
+    print("   Aponte API_URL, AUTH_URL e AUTH_2FA_URL para esses endereços. Ctrl+C para encerrar.")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n🛑 Encerrado após {servidor.requisicoes} requisições")
+    finally:
+        servidor.server_close()
+
+if __name__ == "__main__":
+    main()